@@ -0,0 +1,5 @@
+"""Helpers shared by the q1, q2 and q3 scripts.
+
+The scripts are run directly, so each one puts A1/ on sys.path before
+importing from here.
+"""
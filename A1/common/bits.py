@@ -0,0 +1,14 @@
+"""Bit counting over packed uint64 rows (q1/itemsets.py, q3/featselect.py)."""
+import numpy as np
+
+if hasattr(np, "bitwise_count"):
+    def popcount_rows(words):
+        """Set bits of each row of a 2D uint64 array, as int64."""
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+else:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount_rows(words):
+        """Set bits of each row of a 2D uint64 array, as int64."""
+        b = np.ascontiguousarray(words).view(np.uint8)
+        return _POP8[b].sum(axis=1, dtype=np.int64)
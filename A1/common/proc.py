@@ -0,0 +1,41 @@
+"""Running a measured child process (q1/bench.py, q2/sweep.py)."""
+import os
+import time
+import signal
+import threading
+import subprocess
+
+
+def run_measured(argv, stdout, stderr, cwd=None, timeout=None):
+    """
+    Run argv to completion, reaped with os.wait4; returns
+    (status, returncode, wall seconds, resource usage).
+
+    status is "ok", "failed" or "timeout". The child gets its own session,
+    so on timeout its whole process group is killed.
+    """
+    start = time.perf_counter()
+    p = subprocess.Popen(argv, cwd=cwd, stdout=stdout, stderr=stderr,
+                         stdin=subprocess.DEVNULL, start_new_session=True)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+    _, status, ru = os.wait4(p.pid, 0)
+    wall = time.perf_counter() - start
+    if timer:
+        timer.cancel()
+    p.returncode = os.waitstatus_to_exitcode(status)
+    if timed_out.is_set():
+        state = "timeout"
+    else:
+        state = "ok" if p.returncode == 0 else "failed"
+    return state, p.returncode, wall, ru
@@ -0,0 +1,82 @@
+"""On-disk indexes derived from a source file (q2/resultstore.py,
+q3/dbindex.py, q3/graphio.py, q3/invariants.py).
+
+An index records the stamp (size, mtime) of the file it was built from and
+is stale once the file's stamp differs. Index directories are filled under a
+temporary name next to their final path and then moved into place, so a
+reader finds the previous index, the new one or none, never a mix of files
+from two builds.
+"""
+import os
+import json
+import shutil
+
+
+def file_stamp(path):
+    """(size, mtime_ns) of a file."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def source_stamp(path):
+    """The stamp of `path` as stored in a header: absolute path, size, mtime."""
+    size, mtime_ns = file_stamp(path)
+    return {"path": os.path.abspath(path), "size": size, "mtime_ns": mtime_ns}
+
+
+def read_header(store_dir, fmt, version):
+    """header.json of an index directory; ValueError if not of this format/version."""
+    with open(os.path.join(store_dir, "header.json")) as f:
+        header = json.load(f)
+    if header.get("format") != fmt or header.get("version") != version:
+        raise ValueError(f"Not a {fmt} v{version} index: {store_dir}")
+    return header
+
+
+def fresh_header(store_dir, path, fmt, version):
+    """The header of the index at `store_dir` if it was built from the
+    current contents of `path`, else None."""
+    try:
+        header = read_header(store_dir, fmt, version)
+    except (OSError, ValueError):
+        return None
+    src = header["source"]
+    return header if (src["size"], src["mtime_ns"]) == file_stamp(path) else None
+
+
+def write_json(path, obj):
+    """Replace the JSON file at `path` in one rename."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp, path)
+
+
+def staging_dir(final_dir):
+    """An empty directory next to `final_dir` to build an index in."""
+    tmp = f"{final_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.mkdir(tmp)
+    return tmp
+
+
+def publish_dir(tmp_dir, final_dir):
+    """Move a built staging_dir to `final_dir`, replacing an older index.
+
+    Readers that already opened files of the old index keep them (they are
+    only unlinked). If another process published first, its index is kept
+    and this one dropped.
+    """
+    old = f"{final_dir}.{os.getpid()}.old"
+    try:
+        os.replace(final_dir, old)
+    except FileNotFoundError:
+        old = None
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        if not os.path.isdir(final_dir):
+            raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
@@ -14,10 +14,15 @@ NOTE:
   on the Baadal server.
 - Due to restricted environments on Baadal, plotting was done locally.
 - Final plots and detailed analysis are included in q1.pdf.
+- New measurements are recorded by bench.py; with --history this script
+  plots them instead of the numbers above.
 """
 
+import argparse
 import matplotlib.pyplot as plt
 
+from bench import read_history
+
 # Minimum support thresholds used in the experiments
 SUPPORTS = [5, 10, 25, 50, 90]
 
@@ -39,8 +44,44 @@ def plot_runtimes(apriori_times, fpgrowth_times, title, output_file):
     plt.show()
 
 
-if __name__ == "__main__":
+def runtimes_from_history(path, dataset, label=None):
+    """
+    Median runtimes of Apriori and FP-Growth at SUPPORTS for one dataset,
+    from the latest matching records of a bench.py history file
+    (None where a point is missing or produced no timed run).
+    """
+    latest = {}
+    for rec in read_history(path):
+        if rec["dataset"] != dataset or (label is not None and rec["label"] != label):
+            continue
+        latest[(rec["miner"], rec["support"])] = rec
+
+    def times(miner):
+        out = []
+        for s in SUPPORTS:
+            rec = latest.get((miner, s))
+            out.append(rec["median_wall_s"] if rec else None)
+        return out
+    return times("apriori"), times("fpgrowth")
+
 
+def main():
+    ap = argparse.ArgumentParser(description="Plot Apriori vs FP-Growth runtimes.")
+    ap.add_argument("--history", help="bench.py history file to plot from")
+    ap.add_argument("--dataset", help="dataset file name in the history")
+    ap.add_argument("--label", help="only records with this bench.py label")
+    ap.add_argument("--out", default="runtime.png")
+    args = ap.parse_args()
+
+    if args.history:
+        if not args.dataset:
+            ap.error("--history needs --dataset")
+        apriori_times, fpgrowth_times = runtimes_from_history(args.history, args.dataset, args.label)
+        plot_runtimes(apriori_times, fpgrowth_times,
+                      f"Runtime Comparison on {args.dataset}", args.out)
+        return
+
+    # Recorded Baadal measurements
     # Task 1: webdocs.dat
     # Apriori at 5% exceeded the 3600 second time limit
     apriori_task1 = [3600, 636, 38, 35, 33]
@@ -64,3 +105,7 @@ if __name__ == "__main__":
         "runtime_generated.png"
     )
 
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,221 @@
+"""
+bench.py
+
+Benchmark harness for the Apriori / FP-Growth comparison.
+
+Every miner runs at every minimum support threshold, first `--warmup` times
+untimed and then `--repeat` times measured. Each measured run is a child
+process reaped with os.wait4, giving its wall time and peak RSS; the frequent
+itemsets it writes are counted (lines and bytes) as the output-size metric.
+
+Results are appended to a JSON-lines history file, one record per
+(miner, support), tagged with a run label, the dataset and the host, so runs
+of different versions and datasets can be compared later (analysis.py plots
+from it). With --baseline, the median wall time and peak RSS of every
+record are checked against the matching record of a baseline file and
+regressions are reported.
+
+Miner commands are templates; the default is the invocation of q1_1.sh,
+    {exe} -s {support} {dataset}
+with the itemsets taken from standard output. A template containing {out}
+passes an output file to the miner instead.
+
+Usage:
+    python3 bench.py --miner apriori=<exe> --miner fpgrowth=<exe> \
+        --dataset webdocs.dat --outdir out [--warmup 1 --repeat 3] \
+        [--history bench_history.jsonl] [--baseline base.jsonl]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.proc import run_measured
+
+SUPPORTS = [5, 10, 25, 50, 90]
+DEFAULT_TEMPLATE = "{exe} -s {support} {dataset}"
+
+
+def run_once(argv, out_path, log_path, timeout=None, stdout_out=False):
+    """
+    Run one miner invocation; returns (status, wall seconds, peak RSS KiB).
+    status is "ok", "failed" or "timeout". Standard error goes to log_path,
+    standard output too unless `stdout_out` sends it to out_path.
+    """
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    with open(log_path, "w") as log, open(out_path if stdout_out else os.devnull, "w") as out:
+        status, _, wall, ru = run_measured(argv, out if stdout_out else log, log, timeout=timeout)
+    return status, wall, ru.ru_maxrss
+
+
+def output_size(path):
+    """(itemset lines, bytes) of a miner output file; (0, 0) if missing."""
+    if not os.path.exists(path):
+        return 0, 0
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines, os.path.getsize(path)
+
+
+def bench_miner(name, template, exe, dataset, support, outdir,
+                warmup=1, repeat=3, timeout=None):
+    """
+    Warm up and time one (miner, support) point; returns its history record.
+    A failed or timed-out run, warmup or not, ends the point early: its
+    status and measurements are recorded and the remaining runs skipped, so
+    a timed-out point reports about the timeout as its wall time.
+    """
+    out_path = os.path.join(outdir, f"{name}{support}.out")
+    log_path = os.path.join(outdir, f"{name}{support}.log")
+    argv = template.format(exe=exe, support=support, dataset=dataset, out=out_path).split()
+    stdout_out = "{out}" not in template
+
+    status = "ok"
+    walls, rss = [], []
+    for _ in range(warmup):
+        status, wall, peak = run_once(argv, out_path, log_path, timeout, stdout_out)
+        if status != "ok":
+            walls.append(round(wall, 6))
+            rss.append(peak)
+            break
+    if status == "ok":
+        for _ in range(repeat):
+            status, wall, peak = run_once(argv, out_path, log_path, timeout, stdout_out)
+            walls.append(round(wall, 6))
+            rss.append(peak)
+            if status != "ok":
+                break
+    itemsets, out_bytes = output_size(out_path)
+    return {
+        "miner": name,
+        "support": support,
+        "status": status,
+        "wall_s": walls,
+        "median_wall_s": statistics.median(walls) if walls else None,
+        "max_rss_kb": max(rss) if rss else None,
+        "itemsets": itemsets,
+        "output_bytes": out_bytes,
+        "warmup": warmup,
+    }
+
+
+def read_history(path):
+    """All records of a JSON-lines history file."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def append_history(path, records):
+    with open(path, "a") as f:
+        for rec in records:
+            f.write(json.dumps(rec, sort_keys=True) + "\n")
+
+
+def _key(rec):
+    return (rec["dataset"], rec["miner"], rec["support"])
+
+
+def find_regressions(records, baseline, tolerance=0.10, min_delta_s=0.05):
+    """
+    Compare records with the latest baseline record of the same
+    (dataset, miner, support).
+
+    Median wall time regresses when it grows by more than `tolerance` and
+    by at least `min_delta_s` seconds (so sub-second noise is not flagged);
+    peak RSS when it grows by more than `tolerance`; a point that ran fine in
+    the baseline regresses when it now fails or times out.
+    Returns a list of human-readable messages.
+    """
+    base = {}
+    for rec in baseline:
+        base[_key(rec)] = rec
+    msgs = []
+    for rec in records:
+        old = base.get(_key(rec))
+        if old is None:
+            continue
+        where = f"{rec['miner']} @ {rec['support']}% on {rec['dataset']}"
+        if old["status"] == "ok" and rec["status"] != "ok":
+            msgs.append(f"{where}: {rec['status']} (baseline ok)")
+            continue
+        if rec["status"] != "ok" or old["status"] != "ok":
+            continue
+        t_new, t_old = rec["median_wall_s"], old["median_wall_s"]
+        if t_new > t_old * (1 + tolerance) and t_new - t_old >= min_delta_s:
+            msgs.append(f"{where}: wall {t_old:.3f}s -> {t_new:.3f}s (+{100 * (t_new / t_old - 1):.0f}%)")
+        m_new, m_old = rec["max_rss_kb"], old["max_rss_kb"]
+        if m_old and m_new > m_old * (1 + tolerance):
+            msgs.append(f"{where}: max RSS {m_old} -> {m_new} KiB (+{100 * (m_new / m_old - 1):.0f}%)")
+    return msgs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark itemset miners across support thresholds.")
+    ap.add_argument("--miner", action="append", required=True, metavar="NAME=EXE",
+                    help="miner to run (repeatable), e.g. apriori=./apriori")
+    ap.add_argument("--template", action="append", default=[], metavar="NAME=CMD",
+                    help=f"command template of a miner (default: '{DEFAULT_TEMPLATE}')")
+    ap.add_argument("--dataset", required=True)
+    ap.add_argument("--outdir", required=True, help="miner outputs and logs")
+    ap.add_argument("--supports", type=int, nargs="+", default=SUPPORTS)
+    ap.add_argument("--warmup", type=int, default=1, help="untimed runs per point")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per point")
+    ap.add_argument("--timeout", type=float, help="seconds before a run is killed")
+    ap.add_argument("--history", default="bench_history.jsonl", help="JSON-lines file results are appended to")
+    ap.add_argument("--label", default="", help="tag stored with every record, e.g. a version")
+    ap.add_argument("--baseline", help="JSON-lines file of records to check for regressions against")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown / RSS growth")
+    ap.add_argument("--fail-on-regression", action="store_true", help="exit with status 2 on regressions")
+    args = ap.parse_args()
+    if args.repeat < 1:
+        ap.error("--repeat must be at least 1")
+
+    miners = dict(m.split("=", 1) for m in args.miner)
+    templates = dict(t.split("=", 1) for t in args.template)
+    os.makedirs(args.outdir, exist_ok=True)
+
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    common = {
+        "time": stamp,
+        "label": args.label,
+        "host": socket.gethostname(),
+        "dataset": os.path.basename(args.dataset),
+        "dataset_bytes": os.path.getsize(args.dataset),
+    }
+    records = []
+    for support in args.supports:
+        for name, exe in miners.items():
+            print(f"Running {name} at {support}% support", flush=True)
+            rec = bench_miner(name, templates.get(name, DEFAULT_TEMPLATE), exe, args.dataset,
+                              support, args.outdir, args.warmup, args.repeat, args.timeout)
+            rec.update(common)
+            records.append(rec)
+            print(f"  {rec['status']}: median {rec['median_wall_s']:.3f}s, "
+                  f"max RSS {rec['max_rss_kb']} KiB, {rec['itemsets']} itemsets", flush=True)
+    append_history(args.history, records)
+
+    if args.baseline:
+        msgs = find_regressions(records, read_history(args.baseline), args.tolerance)
+        for m in msgs:
+            print("REGRESSION:", m)
+        if not msgs:
+            print("No regressions against", args.baseline)
+        if msgs and args.fail_on_regression:
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
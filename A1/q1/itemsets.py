@@ -0,0 +1,287 @@
+"""
+itemsets.py
+
+In-process frequent itemset mining: Apriori and FP-Growth behind one API.
+
+Transactions are read from a .dat file (one transaction per line, items
+separated by whitespace) in two streaming passes: the first counts items,
+the second feeds the frequent items of each transaction to the algorithm.
+Items are renumbered by descending frequency (rank 0 = most frequent);
+results carry the original item tokens.
+
+- Apriori keeps one bitset per frequent item over all transactions (NumPy
+  uint64 words). Candidates sharing a (k-1)-prefix are counted together: the
+  prefix bitset is ANDed with the bitsets of all extension items in one
+  array operation and the rows are popcounted.
+- FP-Growth builds an FP-tree whose nodes live in parallel int lists (item,
+  count, parent, next node of the same item) instead of node objects, and
+  mines it through conditional trees of the same layout; a tree that is a
+  single path is expanded directly.
+
+Usage:
+    python3 itemsets.py [-a apriori|fpgrowth] -s <support %> <dataset.dat> [<output>]
+
+Each frequent itemset is written as its items followed by its absolute
+support in parentheses, e.g. "12 7 3 (4211)". The same command line works as
+a bench.py template:
+    --miner py-fp=itemsets.py --template "py-fp=python3 {exe} -s {support} {dataset}"
+"""
+
+import os
+import sys
+import math
+import argparse
+from collections import Counter, defaultdict
+from itertools import combinations
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bits import popcount_rows
+
+CHUNK = 8192  # transactions per bitset block (multiple of 64)
+
+
+def iter_transactions(path):
+    """Yield each non-empty transaction of a .dat file as a list of item tokens."""
+    with open(path) as f:
+        for line in f:
+            items = line.split()
+            if items:
+                yield items
+
+
+def count_items(path):
+    """(item token -> number of transactions containing it, number of transactions)."""
+    counts = Counter()
+    n = 0
+    for t in iter_transactions(path):
+        counts.update(set(t))
+        n += 1
+    return counts, n
+
+
+def rank_items(counts, min_count):
+    """Frequent item tokens ordered by descending support (ties by token)."""
+    return sorted((it for it, c in counts.items() if c >= min_count), key=lambda it: (-counts[it], it))
+
+
+def iter_ranked(path, rank):
+    """Yield each transaction's frequent items as ascending ranks (may be empty)."""
+    for t in iter_transactions(path):
+        yield sorted({rank[it] for it in t if it in rank})
+
+
+# -------------------------------------------------
+# Apriori over vertical bitsets
+# -------------------------------------------------
+
+def item_bitsets(path, rank, n):
+    """(F, ceil(n/64)) uint64 matrix: bit t of row i is set if transaction t has item i."""
+    F = len(rank)
+    n_words = (n + 63) // 64
+    bits = np.zeros((F, n_words), dtype=np.uint64)
+    block = np.zeros((F, CHUNK), dtype=bool)
+    rows, cols = [], []
+    t0 = 0
+    t = 0
+
+    def flush(t_end):
+        block[rows, cols] = True
+        packed = np.packbits(block, axis=1, bitorder="little").view("<u8")
+        w0 = t0 // 64
+        w1 = (t_end + 63) // 64
+        bits[:, w0:w1] = packed[:, :w1 - w0]
+        block[rows, cols] = False
+
+    for ranks in iter_ranked(path, rank):
+        rows.extend(ranks)
+        cols.extend([t - t0] * len(ranks))
+        t += 1
+        if t - t0 == CHUNK:
+            flush(t)
+            rows, cols = [], []
+            t0 = t
+    if t > t0:
+        flush(t)
+    return bits
+
+
+def apriori(path, min_count, counts=None, n=None):
+    """Yield the frequent items by rank, then (itemset as ascending ranks, support)
+    for every frequent itemset. counts/n: count_items(path), if known."""
+    if counts is None:
+        counts, n = count_items(path)
+    items = rank_items(counts, min_count)
+    rank = {it: r for r, it in enumerate(items)}
+    yield items
+    if not items:
+        return
+    bits = item_bitsets(path, rank, n)
+    level = []
+    for r, it in enumerate(items):
+        level.append((r,))
+        yield (r,), counts[it]
+
+    while level:
+        freq = set(level)
+        groups = defaultdict(list)  # (k-1)-prefix -> last items, ascending
+        for x in level:
+            groups[x[:-1]].append(x[-1])
+        nxt = []
+        for prefix, lasts in groups.items():
+            for i, a in enumerate(lasts[:-1]):
+                base = prefix + (a,)
+                # Apriori pruning: every k-subset must be frequent; the two
+                # that drop a or b are base and prefix+(b,) themselves
+                cands = [b for b in lasts[i + 1:]
+                         if all(base[:j] + base[j + 1:] + (b,) in freq for j in range(len(prefix)))]
+                if not cands:
+                    continue
+                pbits = np.bitwise_and.reduce(bits[list(base)], axis=0)
+                sup = popcount_rows(bits[cands] & pbits)
+                for b, s in zip(cands, sup.tolist()):
+                    if s >= min_count:
+                        x = base + (b,)
+                        nxt.append(x)
+                        yield x, s
+        level = nxt
+
+
+# -------------------------------------------------
+# FP-Growth over an array-backed FP-tree
+# -------------------------------------------------
+
+class FPTree:
+    """FP-tree with nodes as indices into parallel lists; node 0 is the root.
+
+    item/count/parent: per node; link: next node holding the same item
+    (-1 ends the chain); head: item -> first node of its chain; total:
+    item -> summed count; child: (node, item) -> child node.
+    """
+    __slots__ = ("item", "count", "parent", "link", "head", "total", "child", "single")
+
+    def __init__(self):
+        self.item = [-1]
+        self.count = [0]
+        self.parent = [-1]
+        self.link = [-1]
+        self.head = {}
+        self.total = defaultdict(int)
+        self.child = {}
+        self.single = True  # no node has two children
+
+    def insert(self, ranks, cnt):
+        item, count, parent, link, head, child = self.item, self.count, self.parent, self.link, self.head, self.child
+        node = 0
+        for r in ranks:
+            nxt = child.get((node, r))
+            if nxt is None:
+                nxt = len(item)
+                if node != nxt - 1:  # node already has a child
+                    self.single = False
+                item.append(r)
+                count.append(0)
+                parent.append(node)
+                link.append(head.get(r, -1))
+                head[r] = nxt
+                child[(node, r)] = nxt
+            count[nxt] += cnt
+            self.total[r] += cnt
+            node = nxt
+
+
+def _mine_tree(tree, suffix, min_count):
+    if tree.single:
+        # one path: every combination of its items, supported by its deepest node
+        path = list(range(1, len(tree.item)))
+        for k in range(1, len(path) + 1):
+            for combo in combinations(path, k):
+                yield tuple(tree.item[v] for v in combo) + suffix, tree.count[combo[-1]]
+        return
+    item, count, parent, link = tree.item, tree.count, tree.parent, tree.link
+    for r in sorted(tree.head, reverse=True):  # least frequent first
+        s = tree.total[r]
+        if s < min_count:
+            continue
+        new_suffix = (r,) + suffix
+        yield new_suffix, s
+        # conditional pattern base: prefix paths of r's nodes
+        paths = []
+        sub_counts = defaultdict(int)
+        v = tree.head[r]
+        while v != -1:
+            c = count[v]
+            p = parent[v]
+            path = []
+            while p > 0:
+                path.append(item[p])
+                p = parent[p]
+            if path:
+                paths.append((path, c))
+                for x in path:
+                    sub_counts[x] += c
+            v = link[v]
+        keep = {x for x, c in sub_counts.items() if c >= min_count}
+        if not keep:
+            continue
+        cond = FPTree()
+        for path, c in paths:
+            ranks = [x for x in reversed(path) if x in keep]
+            if ranks:
+                cond.insert(ranks, c)
+        yield from _mine_tree(cond, new_suffix, min_count)
+
+
+def fpgrowth(path, min_count, counts=None, n=None):
+    """Same protocol as apriori(); itemset ranks come in no particular order."""
+    if counts is None:
+        counts, n = count_items(path)
+    items = rank_items(counts, min_count)
+    rank = {it: r for r, it in enumerate(items)}
+    yield items
+    tree = FPTree()
+    for ranks in iter_ranked(path, rank):
+        if ranks:
+            tree.insert(ranks, 1)
+    yield from _mine_tree(tree, (), min_count)
+
+
+ALGORITHMS = {"apriori": apriori, "fpgrowth": fpgrowth}
+
+
+def mine(path, min_support, algorithm="fpgrowth"):
+    """
+    Frequent itemsets of a .dat file, as (tuple of item tokens, support count).
+
+    min_support is a percentage of the transactions; an itemset is frequent
+    when it occurs in at least ceil(min_support/100 * n) of them. Items of an
+    itemset are listed by descending item frequency.
+    """
+    counts, n = count_items(path)
+    min_count = max(1, math.ceil(min_support / 100 * n))
+    gen = ALGORITHMS[algorithm](path, min_count, counts, n)
+    items = next(gen)
+    for ranks, s in gen:
+        yield tuple(items[r] for r in sorted(ranks)), s
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mine frequent itemsets with Apriori or FP-Growth.")
+    ap.add_argument("-a", "--algorithm", choices=sorted(ALGORITHMS), default="fpgrowth")
+    ap.add_argument("-s", "--support", type=float, required=True, help="minimum support in percent")
+    ap.add_argument("dataset")
+    ap.add_argument("output", nargs="?", help="output file (default: standard output)")
+    args = ap.parse_args()
+
+    out = open(args.output, "w", buffering=1 << 20) if args.output else sys.stdout
+    try:
+        for itemset, s in mine(args.dataset, args.support, args.algorithm):
+            out.write(" ".join(itemset) + f" ({s})\n")
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,46 +9,21 @@ mkdir -p $OUTDIR
 
 SUPPORTS=(5 10 25 50 90)
 
-for S in "${SUPPORTS[@]}"; do
-    echo "Running Apriori at ${S}% support"
-    /usr/bin/time -v $APRIORI_EXEC -s $S $DATASET > $OUTDIR/ap${S} 2>&1
-
-    echo "Running FP-Growth at ${S}% support"
-    /usr/bin/time -v $FPGROWTH_EXEC -s $S $DATASET > $OUTDIR/fp${S} 2>&1
-done
-
-python3 - <<EOF
-import matplotlib.pyplot as plt
-
-supports = [5,10,25,50,90]
-ap_times = []
-fp_times = []
-
-for s in supports:
-    with open(f"$OUTDIR/ap{s}") as f:
-        for line in f:
-            if "Elapsed (wall clock) time" in line:
-                t = line.strip().split()[-1]
-                if ":" in t:
-                    m, sec = t.split(":")
-                    ap_times.append(float(m)*60 + float(sec))
-                else:
-                    ap_times.append(float(t))
-
-    with open(f"$OUTDIR/fp{s}") as f:
-        for line in f:
-            if "Elapsed (wall clock) time" in line:
-                t = line.strip().split()[-1]
-                if ":" in t:
-                    m, sec = t.split(":")
-                    fp_times.append(float(m)*60 + float(sec))
-                else:
-                    fp_times.append(float(t))
-
-plt.plot(supports, ap_times, marker='o', label='Apriori')
-plt.plot(supports, fp_times, marker='o', label='FP-Growth')
-plt.xlabel("Support Threshold (%)")
-plt.ylabel("Runtime (seconds)")
-plt.legend()
-plt.savefig(f"$OUTDIR/plot.png")
-EOF
+BASE_DIR=$(dirname "$0")
+
+# timed runs with peak RSS and output size per (miner, support); records
+# are appended to $OUTDIR/history.jsonl. One run per point by default, as
+# low supports can take hours on webdocs: set Q1_WARMUP / Q1_REPEAT for
+# warmup and repeated runs, Q1_TIMEOUT (seconds) to cap each run.
+# Set Q1_BASELINE to a history file to flag regressions against it.
+python3 "$BASE_DIR/bench.py" \
+    --miner apriori="$APRIORI_EXEC" --miner fpgrowth="$FPGROWTH_EXEC" \
+    --dataset "$DATASET" --outdir "$OUTDIR" \
+    --supports "${SUPPORTS[@]}" \
+    --warmup "${Q1_WARMUP:-0}" --repeat "${Q1_REPEAT:-1}" \
+    ${Q1_TIMEOUT:+--timeout "$Q1_TIMEOUT"} \
+    --history "$OUTDIR/history.jsonl" \
+    ${Q1_BASELINE:+--baseline "$Q1_BASELINE"}
+
+python3 "$BASE_DIR/analysis.py" --history "$OUTDIR/history.jsonl" \
+    --dataset "$(basename "$DATASET")" --out "$OUTDIR/plot.png"
@@ -0,0 +1,47 @@
+import math
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+import itemsets
+
+
+def _write_dat(path, seed=0, n=300):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        # skewed item frequencies, so itemsets of several sizes are frequent
+        rows.append(sorted({str(min(rng.randrange(20), rng.randrange(20))) for _ in range(rng.randint(1, 8))}))
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(" ".join(row) + "\n")
+    return rows
+
+
+def _brute(rows, min_count):
+    sup = Counter()
+    for row in rows:
+        for size in range(1, len(row) + 1):
+            for combo in combinations(row, size):
+                sup[frozenset(combo)] += 1
+    return {s: c for s, c in sup.items() if c >= min_count}
+
+
+@pytest.mark.parametrize("algorithm", sorted(itemsets.ALGORITHMS))
+@pytest.mark.parametrize("min_support", [5, 20, 50])
+def test_mine_matches_brute_force(tmp_path, algorithm, min_support):
+    path = tmp_path / "t.dat"
+    rows = _write_dat(path)
+    want = _brute(rows, max(1, math.ceil(min_support / 100 * len(rows))))
+    got = list(itemsets.mine(str(path), min_support, algorithm))
+    assert len(got) == len(want)
+    assert {frozenset(items): s for items, s in got} == want
+
+
+def test_blank_lines_are_not_transactions(tmp_path):
+    path = tmp_path / "t.dat"
+    path.write_text("1 2\n\n1\n   \n2 3\n")
+    got = {frozenset(items): s for items, s in itemsets.mine(str(path), 50, "apriori")}
+    assert got == {frozenset("1"): 2, frozenset("2"): 2}
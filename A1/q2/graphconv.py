@@ -0,0 +1,156 @@
+"""Streaming conversion of the raw graph dataset to gSpan, FSG and Gaston input.
+
+Raw format, one item per line (blank lines ignored):
+    <graph id>
+    <n>            then n vertex labels, one per line
+    <m>            then m edges "u v label" (commas allowed as separators)
+
+Vertex labels map to ids in sorted string order, edge labels in sorted
+integer order. The maps come from one streaming pass over the input, or from
+a JSON label dictionary (--labels) so that pass can be skipped; labels the
+dictionary lacks get the next free ids and the file is updated. Any subset
+of the three formats is then written in a single read of the input.
+
+Usage:
+    python3 graphconv.py <raw_dataset> [--gspan OUT] [--fsg OUT] [--gaston OUT] [--labels labels.json]
+"""
+import os
+import sys
+import json
+import argparse
+
+BUFSIZE = 1 << 20
+
+def _items(f):
+    for line in f:
+        s = line.strip()
+        if s:
+            yield s
+
+def iter_raw_graphs(path):
+    """Yield (vertex labels, [(u, v, edge label)]) per graph, as raw strings."""
+    with open(path) as f:
+        items = _items(f)
+        for _ in items:  # graph id line (ignored)
+            n = int(next(items))
+            vlabels = [next(items) for _ in range(n)]
+            m = int(next(items))
+            edges = [tuple(next(items).replace(",", " ").split()) for _ in range(m)]
+            yield vlabels, edges
+
+def collect_labels(path):
+    """Label maps (vertex, edge) of a raw dataset, from one streaming pass."""
+    vlabels = set()
+    elabels = set()
+    for vl, edges in iter_raw_graphs(path):
+        vlabels.update(vl)
+        elabels.update(e[2] for e in edges)
+    vmap = {lab: idx for idx, lab in enumerate(sorted(vlabels))}
+    emap = {lab: idx for idx, lab in enumerate(sorted(elabels, key=int))}
+    return vmap, emap
+
+def load_labels(path):
+    with open(path) as f:
+        d = json.load(f)
+    return d["vertex"], d["edge"]
+
+def save_labels(path, vmap, emap):
+    with open(path, "w") as f:
+        json.dump({"vertex": vmap, "edge": emap}, f, indent=1)
+
+class _Growing(dict):
+    # label map that hands out the next free id to unseen labels
+    def __init__(self, labels):
+        super().__init__(labels)
+        self.next = max(self.values(), default=-1) + 1
+        self.added = False
+
+    def __missing__(self, lab):
+        self[lab] = idx = self.next
+        self.next += 1
+        self.added = True
+        return idx
+
+# -------------------------------------------------
+# Per-format writers: each renders one graph to text
+# -------------------------------------------------
+def gspan_graph(gid, vids, edges):
+    # t # 0, 1, ...; edges as listed
+    out = [f"t # {gid}\n"]
+    out += [f"v {i} {l}\n" for i, l in enumerate(vids)]
+    out += [f"e {u} {v} {l}\n" for u, v, l in edges]
+    return "".join(out)
+
+def fsg_graph(gid, vids, edges):
+    # undirected edges as (min, max, label), deduplicated and sorted
+    es = set()
+    for u, v, l in edges:
+        u, v = int(u), int(v)
+        es.add((u, v, l) if u <= v else (v, u, l))
+    out = ["t\n"]
+    out += [f"v {i} {l}\n" for i, l in enumerate(vids)]
+    out += [f"u {u} {v} {l}\n" for u, v, l in sorted(es)]
+    return "".join(out)
+
+def gaston_graph(gid, vids, edges):
+    # t # 1, 2, ...
+    return gspan_graph(gid + 1, vids, edges)
+
+FORMATS = {"gspan": gspan_graph, "fsg": fsg_graph, "gaston": gaston_graph}
+
+def convert(inp, outputs, label_path=None):
+    """Write `inp` in every format of `outputs` ({format: path}).
+
+    Returns (vertex map, edge map, number of graphs).
+    """
+    if label_path and os.path.exists(label_path):
+        vmap, emap = load_labels(label_path)
+    else:
+        vmap, emap = collect_labels(inp)
+        if label_path:
+            save_labels(label_path, vmap, emap)
+    vmap, emap = _Growing(vmap), _Growing(emap)
+
+    files = [(FORMATS[fmt], open(path, "w", buffering=BUFSIZE)) for fmt, path in outputs.items()]
+    n = 0
+    try:
+        for vl, edges in iter_raw_graphs(inp):
+            vids = [vmap[l] for l in vl]
+            es = [(u, v, emap[l]) for u, v, l in edges]
+            for render, f in files:
+                f.write(render(n, vids, es))
+            n += 1
+    finally:
+        for _, f in files:
+            f.close()
+    if label_path and (vmap.added or emap.added):
+        save_labels(label_path, vmap, emap)
+    return dict(vmap), dict(emap), n
+
+def convert_one(fmt, argv=None):
+    """Entry point of the single-format convert2<fmt>.py wrappers."""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit(f"usage: convert2{fmt}.py <raw_dataset> <out>")
+    vmap, emap, _ = convert(argv[0], {fmt: argv[1]})
+    print("Node label mapping:", vmap)
+    print("Edge label mapping:", emap)
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert a raw graph dataset to gSpan/FSG/Gaston input in one read.")
+    ap.add_argument("raw_dataset")
+    for fmt in FORMATS:
+        ap.add_argument(f"--{fmt}", metavar="OUT", help=f"write {fmt} format here")
+    ap.add_argument("--labels", help="JSON label dictionary to read (or create)")
+    args = ap.parse_args()
+
+    outputs = {fmt: getattr(args, fmt) for fmt in FORMATS if getattr(args, fmt)}
+    if not outputs:
+        ap.error("nothing to write: give at least one of --gspan/--fsg/--gaston")
+    vmap, emap, n = convert(args.raw_dataset, outputs, args.labels)
+    print("Node label mapping:", vmap)
+    print("Edge label mapping:", emap)
+    print("Graphs:", n)
+
+if __name__ == "__main__":
+    main()
@@ -30,76 +30,31 @@ DATASET_GSPAN="$OUTDIR/yeast.gspan"
 DATASET_FSG="$OUTDIR/yeast.fsg"
 DATASET_GASTON="$OUTDIR/yeast.gaston"
 
-python3 "$BASE_DIR/convert2gspan.py"  "$RAW_DATASET" "$DATASET_GSPAN"
-python3 "$BASE_DIR/convert2fsg.py"    "$RAW_DATASET" "$DATASET_FSG"
-python3 "$BASE_DIR/convert2gaston.py" "$RAW_DATASET" "$DATASET_GASTON"
+# one streaming read of the raw dataset writes all three formats
+python3 "$BASE_DIR/graphconv.py" "$RAW_DATASET" \
+    --gspan "$DATASET_GSPAN" \
+    --fsg "$DATASET_FSG" \
+    --gaston "$DATASET_GASTON"
 
 # ============================================================
-# Count graphs (for Gaston absolute support)
+# Gaston (absolute support), FSG (percent), gSpan (relative):
+# every (miner, support) job runs through sweep.py, Q2_JOBS at a
+# time (default: all cores), killed after Q2_TIMEOUT seconds if set.
+# Wall/CPU time and peak RSS land in $OUTDIR/results.{csv,json}.
 # ============================================================
-
-TOTAL_GRAPHS=$(grep -c "^t" "$DATASET_GSPAN")
-echo "Total graphs detected: $TOTAL_GRAPHS"
+# a failed or timed-out job is reported (and fails the script) after the
+# plot of the jobs that did finish
+status=0
+python3 "$BASE_DIR/sweep.py" "$GSPAN" "$FSG" "$GASTON" "$OUTDIR" \
+    --supports "${SUPPORTS[@]}" \
+    ${Q2_JOBS:+--jobs "$Q2_JOBS"} ${Q2_TIMEOUT:+--timeout "$Q2_TIMEOUT"} || status=$?
 
 cd "$OUTDIR"
 
-# ============================================================
-# PHASE 1: GASTON (ABSOLUTE SUPPORT)
-# ============================================================
-echo "========== PHASE 1: GASTON =========="
-
-for s in "${SUPPORTS[@]}"; do
-    DIR="gaston$s"
-    mkdir -p "$DIR"
-
-    ABS_SUP=$(( (TOTAL_GRAPHS * s + 99) / 100 ))
-
-    START=$(date +%s.%N)
-    "$GASTON" "$ABS_SUP" "$DATASET_GASTON" "$DIR/output.gaston" \
-        > "$DIR/log.txt" 2>&1
-    END=$(date +%s.%N)
-
-    echo "$(echo "$END - $START" | bc)" > "$DIR/time.txt"
-done
-
-# ============================================================
-# PHASE 2: FSG (PERCENT SUPPORT)
-# ============================================================
-echo "========== PHASE 2: FSG =========="
-
-for s in "${SUPPORTS[@]}"; do
-    DIR="fsg$s"
-    mkdir -p "$DIR"
-
-    START=$(date +%s.%N)
-    "$FSG" -s "$s" -pt "$DATASET_FSG" \
-        > "$DIR/log.txt" 2>&1
-    END=$(date +%s.%N)
-
-    echo "$(echo "$END - $START" | bc)" > "$DIR/time.txt"
-done
-
-# ============================================================
-# PHASE 3: gSpan (RELATIVE SUPPORT)
-# ============================================================
-echo "========== PHASE 3: gSpan =========="
-
-for s in "${SUPPORTS[@]}"; do
-    DIR="gspan$s"
-    mkdir -p "$DIR"
-
-    REL_SUP=$(echo "$s / 100" | bc -l)
-
-    START=$(date +%s.%N)
-    "$GSPAN" -f "$DATASET_GSPAN" -s "$REL_SUP" -o -i \
-        > "$DIR/log.txt" 2>&1
-    END=$(date +%s.%N)
-
-    mv "$DATASET_GSPAN.fp" "$DIR/output.fp"
-    echo "$(echo "$END - $START" | bc)" > "$DIR/time.txt"
-done
-
-echo "All phases completed successfully."
+if [ "$status" -eq 0 ]; then
+    echo "All phases completed successfully."
+fi
 
 python3 "$BASE_DIR/plot_runtime.py"
 
+exit "$status"
@@ -0,0 +1,218 @@
+"""Streaming reader and columnar index for mined pattern files.
+
+Reads the results of the three miners of Q2 without loading them:
+    Gaston   "# <support>" then "t <id>", "v i l", "e u v l"
+    gSpan    "t # <id> * <support>", "v ...", "e ...", optional "x: <graph ids>"
+    FSG      "t # <size>-<id>, <support>", "v ...", "u u v l"
+A pattern's id is its position in the file (0-based).
+
+An index is a directory <results>.idx/:
+    header.json     format/version, number of patterns, source file size+mtime
+    support.npy     int64 support of every pattern
+    n_vertices.npy  int32
+    n_edges.npy     int32
+    offset.npy      int64 byte offset of every pattern block, plus the file size
+The columns are opened with np.load(mmap_mode='r'); pattern i is parsed by
+seeking to offset[i] and reading up to offset[i+1].
+
+Usage:
+    python3 resultstore.py <results> [--show ID ...] [--bins N]
+"""
+import os
+import sys
+import argparse
+from array import array
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import store
+
+FORMAT = "q2-patstore"
+VERSION = 1
+COLUMNS = ("support", "n_vertices", "n_edges", "offset")
+
+def _t_support(line):
+    # support on a gSpan ("* s") or FSG (", s") header line, else None
+    if b"*" in line:
+        return int(line.rsplit(b"*", 1)[1])
+    if b"," in line:
+        return int(line.rsplit(b",", 1)[1])
+    return None
+
+def scan(path):
+    """Yield (byte offset, support, n_vertices, n_edges) of every pattern block."""
+    start = None
+    support = nv = ne = 0
+    pending = None  # Gaston "# s" line: (offset, support) until its "t"
+    pos = 0
+    with open(path, "rb") as f:
+        for line in f:
+            c = line[:1]
+            if c == b"v":
+                nv += 1
+            elif c == b"e" or c == b"u":
+                ne += 1
+            elif c == b"#":
+                if start is not None:
+                    yield start, support, nv, ne
+                    start = None
+                pending = (pos, int(line[1:]))
+            elif c == b"t":
+                if start is not None:
+                    yield start, support, nv, ne
+                if pending is not None:
+                    start, support = pending
+                    pending = None
+                else:
+                    start, support = pos, _t_support(line)
+                    if support is None:
+                        raise ValueError(f"{path}: no support on pattern header at byte {pos}")
+                nv = ne = 0
+            pos += len(line)
+    if start is not None:
+        yield start, support, nv, ne
+
+def parse_block(data):
+    """(support, vertex labels, [(u, v, edge label)], graph ids or None) of one block."""
+    support = None
+    labels = []
+    edges = []
+    tids = None
+    for line in data.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        tag = parts[0]
+        if tag == b"#":
+            support = int(parts[1])
+        elif tag == b"t":
+            s = _t_support(line)
+            if s is not None:
+                support = s
+        elif tag == b"v":
+            labels.append(int(parts[2]))
+        elif tag == b"e" or tag == b"u":
+            edges.append((int(parts[1]), int(parts[2]), int(parts[3])))
+        elif tag.startswith(b"x"):
+            tids = [int(x) for x in parts[1:]]
+    return support, labels, edges, tids
+
+def iter_patterns(path):
+    """Yield parsed patterns (see parse_block) of a results file in order."""
+    block = []
+    with open(path, "rb") as f:
+        for line in f:
+            c = line[:1]
+            # a block starts at "#", or at "t" unless a "#" line just opened it
+            if c == b"#" or (c == b"t" and not (len(block) == 1 and block[0][:1] == b"#")):
+                if block:
+                    yield parse_block(b"".join(block))
+                block = []
+            block.append(line)
+    if block:
+        yield parse_block(b"".join(block))
+
+def default_store_dir(path):
+    return path + ".idx"
+
+def build_store(path, store_dir=None):
+    """Index `path` in one streaming pass; returns the store directory."""
+    store_dir = store_dir or default_store_dir(path)
+    cols = {"support": array("q"), "n_vertices": array("i"), "n_edges": array("i"), "offset": array("q")}
+    for off, s, nv, ne in scan(path):
+        cols["offset"].append(off)
+        cols["support"].append(s)
+        cols["n_vertices"].append(nv)
+        cols["n_edges"].append(ne)
+    n = len(cols["offset"])
+    cols["offset"].append(os.path.getsize(path))
+    tmp = store.staging_dir(store_dir)
+    for name, col in cols.items():
+        np.save(os.path.join(tmp, name + ".npy"), np.frombuffer(col, dtype=col.typecode))
+    header = {"format": FORMAT, "version": VERSION, "n": n, "source": store.source_stamp(path)}
+    store.write_json(os.path.join(tmp, "header.json"), header)
+    store.publish_dir(tmp, store_dir)
+    return store_dir
+
+def read_header(store_dir):
+    return store.read_header(store_dir, FORMAT, VERSION)
+
+def is_fresh(store_dir, path):
+    return store.fresh_header(store_dir, path, FORMAT, VERSION) is not None
+
+class PatternStore:
+    """Columns of an index (read-only memmaps) plus random access to patterns."""
+
+    def __init__(self, path, store_dir):
+        self.path = path
+        self.header = read_header(store_dir)
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(store_dir, name + ".npy"), mmap_mode="r"))
+        self._f = None
+
+    def __len__(self):
+        return self.header["n"]
+
+    def __getitem__(self, i):
+        """Pattern i parsed from its block, see parse_block."""
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        if self._f is None:
+            self._f = open(self.path, "rb")
+        start, end = int(self.offset[i]), int(self.offset[i + 1])
+        self._f.seek(start)
+        return parse_block(self._f.read(end - start))
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def size_counts(self, by="n_edges"):
+        """Number of patterns of each size (index = number of edges or vertices)."""
+        return np.bincount(getattr(self, by))
+
+    def support_histogram(self, bins=10):
+        """(counts, bin edges) of the support column, as np.histogram."""
+        return np.histogram(self.support, bins=bins)
+
+def open_store(path):
+    """Open the index of a results file, building it first if missing or stale."""
+    store_dir = default_store_dir(path)
+    if not is_fresh(store_dir, path):
+        build_store(path, store_dir)
+    return PatternStore(path, store_dir)
+
+def main():
+    ap = argparse.ArgumentParser(description="Index a Gaston/gSpan/FSG results file and summarise it.")
+    ap.add_argument("results")
+    ap.add_argument("--show", type=int, nargs="+", default=[], metavar="ID", help="print these patterns")
+    ap.add_argument("--bins", type=int, default=10, help="support histogram bins")
+    args = ap.parse_args()
+
+    store = open_store(args.results)
+    print(f"{len(store)} patterns")
+    if len(store):
+        print("patterns per size (edges):")
+        for size, c in enumerate(store.size_counts()):
+            if c:
+                print(f"  {size:3d}  {c}")
+        counts, edges = store.support_histogram(args.bins)
+        print("support histogram:")
+        for c, lo, hi in zip(counts, edges[:-1], edges[1:]):
+            print(f"  [{lo:.0f}, {hi:.0f})  {c}")
+    for i in args.show:
+        support, labels, edges, tids = store[i]
+        print(f"pattern {i}: support {support}")
+        for v, l in enumerate(labels):
+            print(f"  v {v} {l}")
+        for u, v, l in edges:
+            print(f"  e {u} {v} {l}")
+        if tids is not None:
+            print(f"  graphs: {' '.join(map(str, tids))}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
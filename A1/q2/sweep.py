@@ -0,0 +1,138 @@
+"""Run the (miner, support) sweep of Q2 in parallel with resource accounting.
+
+Every job runs in its own directory <outdir>/<miner><support>/ as q2.sh laid
+them out (log.txt, time.txt, mined patterns), at most --jobs at a time. A job
+is reaped with os.wait4, which gives its wall time, user/system CPU time and
+peak RSS; jobs running past --timeout are killed with their process group.
+All measurements go to <outdir>/results.json and results.csv.
+
+FSG and gSpan write their output next to the input file, so each job runs on
+a symlink to the dataset inside its own directory and their outputs cannot
+clash.
+
+Parallel jobs compete for cores and memory bandwidth; use --jobs 1 when the
+timings themselves are the experiment.
+
+Usage:
+    python3 sweep.py <gspan> <fsg> <gaston> <outdir> [--jobs N] [--timeout SEC]
+"""
+import os
+import csv
+import sys
+import json
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.proc import run_measured
+
+SUPPORTS = [90, 50, 25, 10, 5]
+MINERS = ["gaston", "fsg", "gspan"]
+FIELDS = ["miner", "support", "status", "returncode", "wall_s", "user_s", "sys_s", "max_rss_kb"]
+
+def count_graphs(path):
+    with open(path) as f:
+        return sum(1 for line in f if line.startswith("t"))
+
+def job_command(miner, support, binary, dataset, n_graphs):
+    """(argv, dataset link name, output produced -> name to give it) of one job."""
+    name = os.path.basename(dataset)
+    if miner == "gaston":
+        # absolute support
+        abs_sup = (n_graphs * support + 99) // 100
+        return [binary, str(abs_sup), name, "output.gaston"], name, None
+    if miner == "fsg":
+        # percent support; results land next to the input
+        return [binary, "-s", str(support), "-pt", name], name, None
+    # gSpan: relative support, writes <input>.fp
+    return [binary, "-f", name, "-s", str(support / 100), "-o", "-i"], name, (name + ".fp", "output.fp")
+
+def run_job(argv, cwd, timeout=None):
+    """Run argv in cwd with output to log.txt; returns a result dict."""
+    with open(os.path.join(cwd, "log.txt"), "w") as log:
+        state, returncode, wall, ru = run_measured(argv, log, subprocess.STDOUT, cwd, timeout)
+    return {
+        "status": state,
+        "returncode": returncode,
+        "wall_s": round(wall, 6),
+        "user_s": round(ru.ru_utime, 6),
+        "sys_s": round(ru.ru_stime, 6),
+        "max_rss_kb": ru.ru_maxrss,  # KiB on Linux
+    }
+
+def prepare_job(outdir, miner, support, binary, dataset, n_graphs):
+    jobdir = os.path.join(outdir, f"{miner}{support}")
+    os.makedirs(jobdir, exist_ok=True)
+    argv, link, rename = job_command(miner, support, binary, dataset, n_graphs)
+    link_path = os.path.join(jobdir, link)
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.abspath(dataset), link_path)
+    return jobdir, argv, rename
+
+def sweep(binaries, datasets, outdir, supports=SUPPORTS, jobs=None, timeout=None):
+    """Run every (miner, support) job; returns the result dicts in job order.
+
+    binaries/datasets: {miner: path}. Each finished job also gets time.txt
+    (wall seconds, as plot_runtime.py reads it) when it succeeded.
+    """
+    n_graphs = count_graphs(next(iter(datasets.values())))
+    todo = [(m, s) for m in binaries for s in supports]
+
+    def one(job):
+        miner, support = job
+        jobdir, argv, rename = prepare_job(outdir, miner, support, binaries[miner], datasets[miner], n_graphs)
+        res = {"miner": miner, "support": support}
+        res.update(run_job(argv, jobdir, timeout))
+        if rename and os.path.exists(os.path.join(jobdir, rename[0])):
+            os.replace(os.path.join(jobdir, rename[0]), os.path.join(jobdir, rename[1]))
+        if res["status"] == "ok":
+            with open(os.path.join(jobdir, "time.txt"), "w") as f:
+                f.write(f"{res['wall_s']}\n")
+        print(f"{miner:7s} {support:3d}%  {res['status']:7s} wall {res['wall_s']:.2f}s  "
+              f"cpu {res['user_s'] + res['sys_s']:.2f}s  rss {res['max_rss_kb']} KiB", flush=True)
+        return res
+
+    with ThreadPoolExecutor(jobs or os.cpu_count()) as ex:
+        results = list(ex.map(one, todo))
+    return results
+
+def write_results(outdir, results):
+    with open(os.path.join(outdir, "results.json"), "w") as f:
+        json.dump(results, f, indent=1)
+    with open(os.path.join(outdir, "results.csv"), "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(results)
+
+def main():
+    ap = argparse.ArgumentParser(description="Parallel Gaston/FSG/gSpan support sweep with resource usage.")
+    ap.add_argument("gspan")
+    ap.add_argument("fsg")
+    ap.add_argument("gaston")
+    ap.add_argument("outdir", help="holds the converted datasets; job directories go here")
+    ap.add_argument("--name", default="yeast", help="dataset base name: <outdir>/<name>.{gspan,fsg,gaston}")
+    ap.add_argument("--jobs", type=int, help="jobs run at once (default: CPU count)")
+    ap.add_argument("--timeout", type=float, help="seconds before a job is killed")
+    ap.add_argument("--supports", type=int, nargs="+", default=SUPPORTS, help="support levels in percent")
+    ap.add_argument("--miners", nargs="+", choices=MINERS, default=MINERS)
+    args = ap.parse_args()
+
+    outdir = os.path.abspath(args.outdir)
+    # jobs run inside their own directories: resolve relative binary paths now
+    binaries = {m: os.path.abspath(b) if os.sep in b else b
+                for m, b in ((m, getattr(args, m)) for m in args.miners)}
+    datasets = {m: os.path.join(outdir, f"{args.name}.{m}") for m in args.miners}
+    missing = [p for p in datasets.values() if not os.path.exists(p)]
+    if missing:
+        sys.exit(f"missing converted dataset(s): {', '.join(missing)} (see graphconv.py)")
+
+    results = sweep(binaries, datasets, outdir, args.supports, args.jobs, args.timeout)
+    write_results(outdir, results)
+    bad = [r for r in results if r["status"] != "ok"]
+    if bad:
+        sys.exit(f"{len(bad)} job(s) did not finish: " + ", ".join(f"{r['miner']}{r['support']} ({r['status']})" for r in bad))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+import resultstore
+
+GASTON = "# 5\nt 0\nv 0 1\nv 1 2\ne 0 1 0\n# 3\nt 1\nv 0 1\n# 2\nt 2\nv 0 1\nv 1 1\nv 2 2\ne 0 1 1\ne 1 2 0\n"
+GSPAN = "t # 0 * 5\nv 0 1\nv 1 2\ne 0 1 0\nx: 0 2 3 4 7\n\nt # 1 * 3\nv 0 1\nx: 1 2 3\n\n"
+FSG = "t # 1-0, 5\nv 0 1\nv 1 2\nu 0 1 0\nt # 2-1, 3\nv 0 1\n"
+
+
+@pytest.mark.parametrize("text, supports, sizes", [
+    (GASTON, [5, 3, 2], [(2, 1), (1, 0), (3, 2)]),
+    (GSPAN, [5, 3], [(2, 1), (1, 0)]),
+    (FSG, [5, 3], [(2, 1), (1, 0)]),
+])
+def test_store_matches_streaming_parse(tmp_path, text, supports, sizes):
+    path = tmp_path / "r.out"
+    path.write_text(text)
+    patterns = list(resultstore.iter_patterns(str(path)))
+    assert [p[0] for p in patterns] == supports
+    assert [(len(p[1]), len(p[2])) for p in patterns] == sizes
+
+    store = resultstore.open_store(str(path))
+    try:
+        assert len(store) == len(supports)
+        assert store.support.tolist() == supports
+        assert list(zip(store.n_vertices.tolist(), store.n_edges.tolist())) == sizes
+        assert [store[i] for i in range(len(store))] == patterns
+        assert store[-1] == patterns[-1]
+        with pytest.raises(IndexError):
+            store[len(store)]
+    finally:
+        store.close()
+    assert sorted(os.listdir(tmp_path)) == ["r.out", "r.out.idx"]
+
+
+def test_gspan_graph_ids(tmp_path):
+    path = tmp_path / "r.fp"
+    path.write_text(GSPAN)
+    assert [p[3] for p in resultstore.iter_patterns(str(path))] == [[0, 2, 3, 4, 7], [1, 2, 3]]
+
+
+def test_index_is_rebuilt_when_the_results_change(tmp_path):
+    path = tmp_path / "r.out"
+    path.write_text(GASTON)
+    store_dir = resultstore.default_store_dir(str(path))
+    resultstore.open_store(str(path)).close()
+    assert resultstore.is_fresh(store_dir, str(path))
+    path.write_text(FSG)
+    assert not resultstore.is_fresh(store_dir, str(path))
+    store = resultstore.open_store(str(path))
+    assert store.support.tolist() == [5, 3]
+    store.close()
+    assert sorted(os.listdir(tmp_path)) == ["r.out", "r.out.idx"]
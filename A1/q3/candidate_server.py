@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Resident candidate-lookup service.
+
+Loads the DB index once (see dbindex.py) and answers candidate requests over
+a Unix domain socket (default) or local TCP. The protocol is one JSON object
+per line in each direction:
+
+  -> {"id": 7, "queries": [[0,1,0,...], ...]}        0/1 vectors of length k
+                                                     (or a single vector)
+  <- {"id": 7, "candidates": [[1,5,9], ...], "latency_ms": 0.41}
+  -> {"op": "info"}
+  <- {"n": 64110, "k": 50, "requests": 12, "mean_latency_ms": 0.52}
+
+Candidates are 1-indexed, with the same empty-set fallback as
+generate_candidates.py. A malformed request gets {"error": "..."} and the
+connection stays open. Requests are computed in a thread pool (NumPy drops
+the GIL in the bit tests), so slow requests do not block fast ones; each
+request's latency is logged to stderr.
+
+Usage: candidate_server.py <db_feat.npy|db_index_dir> [--unix PATH | --tcp HOST:PORT]
+"""
+import sys, os, stat, json, time, socket, asyncio, argparse
+import numpy as np
+
+from dbindex import open_db
+from featbits import pack_rows
+from generate_candidates import iter_candidates, one_based
+
+class CandidateService:
+    def __init__(self, db_path, method="auto", mem_mb=64):
+        self.db, self.k, self.postings = open_db(db_path, postings=method != "scan")
+        self.method = method
+        self.mem_mb = mem_mb
+        self.requests = 0
+        self.total_ms = 0.0
+
+    def lookup(self, queries):
+        q = np.asarray(queries)
+        if q.size == 0:
+            q = q.reshape(0, self.k)
+        elif q.ndim == 1:
+            q = q[None, :]
+        if q.ndim != 2 or q.shape[1] != self.k:
+            raise ValueError(f"queries must be 0/1 vectors of length {self.k}, got shape {q.shape}")
+        if not np.isin(q, (0, 1)).all():
+            raise ValueError("query entries must be 0 or 1")
+        q = q.astype(np.uint8)
+        out = []
+        for _, cands_list in iter_candidates(self.db, pack_rows(q), self.k, self.mem_mb,
+                                             self.postings, self.method):
+            out.extend(one_based(ids, self.db.shape[0]).tolist() for ids in cands_list)
+        return out
+
+    def info(self):
+        mean = self.total_ms / self.requests if self.requests else 0.0
+        return {"n": int(self.db.shape[0]), "k": self.k, "requests": self.requests,
+                "mean_latency_ms": round(mean, 3)}
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise TypeError("request must be a JSON object")
+                    if req.get("op") == "info":
+                        resp = self.info()
+                    else:
+                        cands = await loop.run_in_executor(None, self.lookup, req["queries"])
+                        ms = (time.perf_counter() - t0) * 1000
+                        self.requests += 1
+                        self.total_ms += ms
+                        resp = {"id": req.get("id"), "candidates": cands, "latency_ms": round(ms, 3)}
+                        print(f"request {req.get('id')}: {len(cands)} queries in {ms:.2f} ms", file=sys.stderr)
+                except (ValueError, KeyError, TypeError, OverflowError) as e:
+                    resp = {"error": str(e)}
+                writer.write(json.dumps(resp, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(service, unix_path=None, tcp=None):
+    if tcp:
+        host, port = tcp.rsplit(":", 1)
+        server = await asyncio.start_server(service.handle, host, int(port))
+    else:
+        # a stale socket of an earlier run is replaced, any other file kept
+        try:
+            if not stat.S_ISSOCK(os.lstat(unix_path).st_mode):
+                raise FileExistsError(f"{unix_path} exists and is not a socket")
+            os.unlink(unix_path)
+        except FileNotFoundError:
+            pass
+        server = await asyncio.start_unix_server(service.handle, unix_path)
+    print(f"serving n={service.db.shape[0]} k={service.k} on {tcp or unix_path}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+def query(address, queries, req_id=0):
+    """Blocking one-shot client: `address` is a socket path or (host, port)."""
+    fam = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    with socket.socket(fam, socket.SOCK_STREAM) as s:
+        s.connect(address)
+        s.sendall(json.dumps({"id": req_id, "queries": queries}).encode() + b"\n")
+        with s.makefile("rb") as f:
+            return json.loads(f.readline())
+
+def main():
+    ap = argparse.ArgumentParser(usage="candidate_server.py <db_feat.npy|db_index_dir> [--unix PATH | --tcp HOST:PORT]")
+    ap.add_argument("db_path")
+    ap.add_argument("--unix", default="candidates.sock")
+    ap.add_argument("--tcp", help="listen on HOST:PORT instead of a Unix socket")
+    ap.add_argument("--method", choices=("auto", "scan", "postings"), default="auto")
+    ap.add_argument("--mem-mb", type=float, default=64)
+    args = ap.parse_args()
+    service = CandidateService(args.db_path, args.method, args.mem_mb)
+    try:
+        asyncio.run(serve(service, args.unix, args.tcp))
+    except FileExistsError as e:
+        sys.exit(f"candidate_server.py: {e}")
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
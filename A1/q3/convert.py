@@ -1,30 +1,13 @@
 #!/usr/bin/env python3
-import sys, numpy as np
+import argparse, numpy as np
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import os
 
-def parse_graphs(path):
-    graphs=[]
-    node_labels={}
-    edges=[]
-    with open(path,'r') as f:
-        for line in f:
-            s=line.strip()
-            if not s:
-                continue
-            if s=="#":
-                if node_labels:
-                    graphs.append((node_labels, edges))
-                node_labels={}
-                edges=[]
-                continue
-            parts=s.split()
-            if parts[0]=='v':
-                node_labels[int(parts[1])] = int(parts[2])
-            elif parts[0]=='e':
-                edges.append((int(parts[1]), int(parts[2]), int(parts[3])))
-            else:
-                raise ValueError(f"Unknown line: {s}")
-    return graphs
+from featbits import save_packed
+from invariants import InvariantBuilder, invariants_path, save_invariants
+from graphio import iter_graphs, graph_offsets, open_graphs
+from subiso import Pattern, contains
 
 def canonical_edge(lu, el, lv):
     if lu < lv:
@@ -44,101 +27,276 @@ def load_features(path):
             feats.append(tuple(parts))
     return feats
 
-def graph_feature_presence(node_labels, edges, feature):
-    # feature is tuple of strings
-    ftype=feature[0]
-    adj=defaultdict(list)
-    el_map=defaultdict(dict)
-    for u,v,el in edges:
-        adj[u].append((v,el))
-        adj[v].append((u,el))  # make undirected for matching
-        if v not in el_map[u]: el_map[u][v]=el
-        if u not in el_map[v]: el_map[v][u]=el
-
-    if ftype=='EDGE':
-        lu=int(feature[1]); el=int(feature[2]); lv=int(feature[3])
-        # check any edge with endpoint labels and edge label
-        for u,v,el0 in edges:
-            if el0!=el: 
-                continue
-            a=node_labels.get(u); b=node_labels.get(v)
-            if a is None or b is None: 
-                continue
-            if canonical_edge(a, el0, b)==(min(lu,lv), el, max(lu,lv)) and ((lu<=lv and a==lu and b==lv) or True):
-                # canonical match already ignores direction
-                return True
-        return False
-
-    if ftype=='PATH2':
-        la=int(feature[1]); e1=int(feature[2]); lb=int(feature[3]); e2=int(feature[4]); lc=int(feature[5])
-        for b, neighs in adj.items():
-            if node_labels.get(b)!=lb:
-                continue
-            # find neighbor a with label la and edge e1, neighbor c with label lc and edge e2
-            # Because we canonicalized ends, either ordering is allowed; but feature stored already canonical,
-            # so match exact (la,e1) on one side and (lc,e2) on other, in any assignment.
-            has_left=[]
-            has_right=[]
-            for nbr, el in neighs:
-                ln=node_labels.get(nbr)
-                if ln is None: 
-                    continue
-                if ln==la and el==e1:
-                    has_left.append(nbr)
-                if ln==lc and el==e2:
-                    has_right.append(nbr)
-            if has_left and has_right:
-                # ensure distinct endpoints (not required by spec but sensible)
-                for a in has_left:
-                    for c in has_right:
-                        if a!=c:
-                            return True
-        return False
-
-    if ftype=='TRI':
-        l1=int(feature[1]); e12=int(feature[2]); l2=int(feature[3]); e13=int(feature[4]); l3=int(feature[5]); e23=int(feature[6])
-        # find any triple with labels and edge labels
-        nodes=[n for n,l in node_labels.items()]
-        # build candidate nodes by label
+class CompiledGraph:
+    """Per-graph index shared by every feature test on that graph.
+
+    Vertices keep their ids and are bucketed by label (-1: no vertex);
+    adjacency is CSR (`indptr`/`nbr`/`nel`, undirected, one entry per edge
+    endpoint); `pair_els` maps a vertex pair to the distinct edge labels
+    between them (several for parallel edges), `edge_set` holds every (u, v, label) in both directions and
+    `edge_pats` the canonical labelled edges.
+    """
+    __slots__=('labels','by_label','indptr','nbr','nel','pair_els','edge_set','edge_pats')
+
+    def __init__(self, labels, edges):
+        # labels/edges as yielded by graphio.iter_graphs
+        labels=labels.tolist()
+        es=edges.tolist()
         by_label=defaultdict(list)
-        for n,l in node_labels.items():
-            by_label[l].append(n)
-        for n1 in by_label.get(l1, []):
-            for n2 in by_label.get(l2, []):
-                if n2==n1: 
-                    continue
-                if el_map[n1].get(n2)!=e12:
+        for u,l in enumerate(labels):
+            if l>=0:
+                by_label[l].append(u)
+        n=len(labels)
+        deg=[0]*(n+1)
+        for u,v,_ in es:
+            deg[u+1]+=1
+            deg[v+1]+=1
+        for i in range(n):
+            deg[i+1]+=deg[i]
+        nbr=[0]*deg[n]
+        nel=[0]*deg[n]
+        pos=deg[:n]
+        pair_els={}
+        edge_set=set()
+        edge_pats=set()
+        for u,v,el in es:
+            nbr[pos[u]]=v; nel[pos[u]]=el; pos[u]+=1
+            nbr[pos[v]]=u; nel[pos[v]]=el; pos[v]+=1
+            side=pair_els.setdefault((u,v), [])
+            if el not in side:
+                side.append(el)
+                pair_els[(v,u)]=side
+            edge_set.add((u,v,el))
+            edge_set.add((v,u,el))
+            edge_pats.add(canonical_edge(labels[u], el, labels[v]))
+        self.labels=labels
+        self.by_label=by_label
+        self.indptr=deg
+        self.nbr=nbr
+        self.nel=nel
+        self.pair_els=pair_els
+        self.edge_set=edge_set
+        self.edge_pats=edge_pats
+
+def parse_feature(feature):
+    # ('PATH2','1','0','2',...) -> ('PATH2',1,0,2,...)
+    return (feature[0],)+tuple(int(x) for x in feature[1:])
+
+def graph_pattern(feature):
+    # ('GRAPH', i, j, li, el, lj, ...) -> subiso.Pattern of that DFS code
+    flat=feature[1:]
+    if not flat or len(flat)%5:
+        raise ValueError(f"Bad GRAPH feature: {feature}")
+    return Pattern.from_code([flat[p:p+5] for p in range(0, len(flat), 5)])
+
+class FeatureMatcher:
+    """Tests every loaded feature against a compiled graph in one traversal.
+
+    Features are grouped by type into hash lookups: EDGE by canonical labelled
+    edge, PATH2 by centre label and unordered end pair, TRI by the full label
+    tuple; GRAPH patterns are matched one by one (subiso.py). Duplicate
+    feature lines map to several columns.
+    """
+
+    def __init__(self, feats):
+        self.k=len(feats)
+        self.edge=defaultdict(list)       # (lu,el,lv) -> [cols]
+        self.path2=defaultdict(dict)      # lb -> {((la,e1),(lc,e2)) sorted: [cols]}
+        self.path2_ends=defaultdict(set)  # lb -> {(la,e1), ...}
+        self.tri=defaultdict(list)        # (l1,e12,l2,e13,l3,e23) -> [cols]
+        self.tri_labels=set()
+        self.graphs=[]                    # [(subiso.Pattern, col)]
+        for j,feat in enumerate(feats):
+            ftype=feat[0]
+            if ftype=='EDGE':
+                _, lu, el, lv = feat
+                self.edge[canonical_edge(lu, el, lv)].append(j)
+            elif ftype=='PATH2':
+                _, la, e1, lb, e2, lc = feat
+                left=(la,e1); right=(lc,e2)
+                key=(left,right) if left<=right else (right,left)
+                self.path2[lb].setdefault(key, []).append(j)
+                self.path2_ends[lb].update((left,right))
+            elif ftype=='TRI':
+                self.tri[tuple(feat[1:])].append(j)
+                self.tri_labels.update((feat[1], feat[3], feat[5]))
+            elif ftype=='GRAPH':
+                self.graphs.append((graph_pattern(feat), j))
+            else:
+                raise ValueError(f"Unknown feature type: {ftype}")
+
+    def match(self, cg):
+        """Return the column indices of all features present in `cg`."""
+        cols=[]
+        edge=self.edge
+        if edge:
+            pats=cg.edge_pats
+            small,big=(pats,edge) if len(pats)<len(edge) else (edge,pats)
+            for pat in small:
+                if pat in big:
+                    cols.extend(edge[pat])
+        if self.path2:
+            self._match_path2(cg, cols)
+        if self.tri:
+            self._match_tri(cg, cols)
+        for pat, j in self.graphs:
+            if contains(cg, pat):
+                cols.append(j)
+        return cols
+
+    def _match_path2(self, cg, cols):
+        labels=cg.labels; indptr=cg.indptr; nbr=cg.nbr; nel=cg.nel
+        for lb, pairs in self.path2.items():
+            ends=self.path2_ends[lb]
+            todo=dict(pairs)
+            for b in cg.by_label.get(lb, ()):
+                # endpoint key (label, edge label) -> distinct neighbours reaching it
+                at=defaultdict(set)
+                for p in range(indptr[b], indptr[b+1]):
+                    key=(labels[nbr[p]], nel[p])
+                    if key in ends:
+                        at[key].add(nbr[p])
+                keys=sorted(at)
+                for x in range(len(keys)):
+                    sx=at[keys[x]]
+                    for y in range(x, len(keys)):
+                        pair=(keys[x],keys[y])
+                        if pair not in todo:
+                            continue
+                        if x==y:
+                            ok=len(sx)>=2
+                        else:
+                            sy=at[keys[y]]
+                            ok=not (len(sx)==1 and sx==sy)
+                        if ok:
+                            cols.extend(todo.pop(pair))
+                if not todo:
+                    break
+
+    def _match_tri(self, cg, cols):
+        labels=cg.labels; indptr=cg.indptr; nbr=cg.nbr; pair_els=cg.pair_els
+        tl=self.tri_labels
+        todo=dict(self.tri)
+        nb={}
+        for u in range(len(labels)):
+            if labels[u] in tl:
+                nb[u]={v for v in nbr[indptr[u]:indptr[u+1]] if v!=u and labels[v] in tl}
+        for x, nx in nb.items():
+            for y in nx:
+                if y<=x:
                     continue
-                for n3 in by_label.get(l3, []):
-                    if n3==n1 or n3==n2:
-                        continue
-                    if el_map[n1].get(n3)!=e13:
-                        continue
-                    if el_map[n2].get(n3)!=e23:
+                for z in nx & nb[y]:
+                    if z<=y:
                         continue
-                    return True
-        return False
+                    # every ordering, and every label of parallel edges
+                    for n1,n2,n3 in ((x,y,z),(x,z,y),(y,x,z),(y,z,x),(z,x,y),(z,y,x)):
+                        l1, l2, l3 = labels[n1], labels[n2], labels[n3]
+                        for e12 in pair_els[(n1,n2)]:
+                            for e13 in pair_els[(n1,n3)]:
+                                for e23 in pair_els[(n2,n3)]:
+                                    key=(l1, e12, l2, e13, l3, e23)
+                                    if key in todo:
+                                        cols.extend(todo.pop(key))
+                    if not todo:
+                        return
 
-    raise ValueError(f"Unknown feature type: {ftype}")
+_worker_matcher=None
+
+def _init_worker(feats):
+    global _worker_matcher
+    _worker_matcher=FeatureMatcher(feats)
+
+def _featurize_chunk(graphs_path, start, end, out_path, row0, cache):
+    # fills rows [row0, row0+n) of the preallocated .npy in place; only the
+    # row count travels back to the parent. [start, end) is a byte range of
+    # the text file, or a graph index range of the cache
+    X=np.load(out_path, mmap_mode='r+')
+    i=row0
+    graphs=open_graphs(graphs_path).iter_range(start, end) if cache else iter_graphs(graphs_path, start, end)
+    for labels, edges in graphs:
+        X[i, _worker_matcher.match(CompiledGraph(labels, edges))]=1
+        i+=1
+    X.flush()
+    del X
+    return i-row0
+
+def featurize_parallel(graphs_path, feats, out_path, workers, packed=False, cache=False, inv_path=None, chunks_per_worker=4):
+    if cache:
+        n=len(open_graphs(graphs_path))
+    else:
+        offs=graph_offsets(graphs_path)
+        n=len(offs)
+    if packed:
+        final_path, out_path = out_path, out_path+'.tmp.npy'
+    elif not out_path.endswith('.npy'):
+        out_path+='.npy'  # same name np.save would pick
+    X=np.lib.format.open_memmap(out_path, mode='w+', dtype=np.uint8, shape=(n, len(feats)))
+    del X
+    nchunks=max(1, min(n, workers*chunks_per_worker))
+    bounds=[n*c//nchunks for c in range(nchunks+1)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(feats,)) as ex:
+        futs=[]
+        for c in range(nchunks):
+            r0, r1 = bounds[c], bounds[c+1]
+            if r0==r1:
+                continue
+            if cache:
+                start, end = r0, r1
+            else:
+                start, end = (offs[r0-1] if r0 else 0), offs[r1-1]
+            futs.append(ex.submit(_featurize_chunk, graphs_path, start, end, out_path, r0, cache))
+        if inv_path:
+            # the parent's share while the workers match
+            inv=InvariantBuilder()
+            for labels, edges in open_graphs(graphs_path, cache):
+                inv.add(labels, edges)
+        for fut in futs:
+            fut.result()
+    if packed:
+        save_packed(final_path, np.load(out_path, mmap_mode='r'))
+        os.remove(out_path)
+        out_path=final_path
+    if inv_path:
+        save_invariants(inv_path, *inv.result(), out_path)
 
 def main():
-    if len(sys.argv)!=4:
-        print("Usage: convert_fixed.py <path_graphs> <path_discriminative_subgraphs> <path_features>", file=sys.stderr)
-        sys.exit(2)
-    graphs_path=sys.argv[1]
-    feat_path=sys.argv[2]
-    out_path=sys.argv[3]
-
-    graphs=parse_graphs(graphs_path)
-    feats=load_features(feat_path)
-    k=len(feats)
-    X=np.zeros((len(graphs), k), dtype=np.uint8)
+    ap=argparse.ArgumentParser(usage="convert.py [--workers N] [--packed] [--cache] [--no-invariants] <path_graphs> <path_discriminative_subgraphs> <path_features>")
+    ap.add_argument('graphs_path')
+    ap.add_argument('feat_path')
+    ap.add_argument('out_path')
+    ap.add_argument('--workers', type=int, default=1, help="featurize graph chunks in N processes")
+    ap.add_argument('--packed', action='store_true', help="write bit-packed uint64 rows (.npz, see featbits.py)")
+    ap.add_argument('--cache', action='store_true', help="read graphs through the binary cache (graphio.open_graphs)")
+    ap.add_argument('--no-invariants', action='store_true', help="do not write <path_features>.inv.npz (see invariants.py)")
+    args=ap.parse_args()
 
-    for i,(node_labels, edges) in enumerate(graphs):
-        for j,feat in enumerate(feats):
-            if graph_feature_presence(node_labels, edges, feat):
-                X[i,j]=1
-    np.save(out_path, X)
+    feats=[parse_feature(f) for f in load_features(args.feat_path)]
+    inv_path=None if args.no_invariants else invariants_path(args.out_path)
+    if args.workers>1:
+        featurize_parallel(args.graphs_path, feats, args.out_path, args.workers, args.packed, args.cache, inv_path)
+        return
+
+    k=len(feats)
+    matcher=FeatureMatcher(feats)
+    # graphs stream in one at a time; only their matched columns (and
+    # invariants) are kept
+    rows=[]
+    inv=InvariantBuilder()
+    for labels, edges in open_graphs(args.graphs_path, args.cache):
+        rows.append(matcher.match(CompiledGraph(labels, edges)))
+        if inv_path:
+            inv.add(labels, edges)
+    X=np.zeros((len(rows), k), dtype=np.uint8)
+    for i,cols in enumerate(rows):
+        X[i, cols]=1
+    if args.packed:
+        save_packed(args.out_path, X)
+    else:
+        np.save(args.out_path, X)
+    if inv_path:
+        # after the features: the invariants record the file they belong to
+        out_path=args.out_path if args.packed or args.out_path.endswith('.npy') else args.out_path+'.npy'
+        save_invariants(inv_path, *inv.result(), out_path)
 
 if __name__=="__main__":
     main()
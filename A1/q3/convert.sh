@@ -1,3 +1,3 @@
 #!/usr/bin/env bash
 set -e
-python3 convert.py "$1" "$2" "$3"
+python3 convert.py "$@"
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Persistent DB index for repeated candidate queries.
+
+An index is a directory:
+  header.json       format/version, n, k, n_words, source file size+mtime
+  words.npy         packed uint64 feature rows (see featbits.py)
+  post_indptr.npy   optional posting lists (featbits.build_postings)
+  post_ids.npy
+Arrays are opened with np.load(mmap_mode='r'), so opening costs no copy and
+concurrent query processes share the page cache.
+
+Usage: dbindex.py [--no-postings] <db_feat> [<index_dir>]
+"""
+import os, sys
+import numpy as np
+
+from featbits import build_postings, load_words
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import store
+
+FORMAT='q3-dbindex'
+VERSION=1
+
+def default_index_dir(db_path):
+    return db_path+'.idx'
+
+def build_index(db_path, index_dir=None, postings=True):
+    index_dir=index_dir or default_index_dir(db_path)
+    words, k = load_words(db_path)
+    # a rebuild (e.g. adding postings) replaces the whole directory, so
+    # processes still reading the old index keep their memmaps
+    tmp=store.staging_dir(index_dir)
+    np.save(os.path.join(tmp, 'words.npy'), np.ascontiguousarray(words, dtype='<u8'))
+    if postings:
+        indptr, ids = build_postings(words, k)
+        np.save(os.path.join(tmp, 'post_indptr.npy'), indptr)
+        np.save(os.path.join(tmp, 'post_ids.npy'), ids)
+    header={'format': FORMAT, 'version': VERSION, 'n': int(words.shape[0]), 'k': k,
+            'n_words': int(words.shape[1]), 'postings': bool(postings),
+            'source': store.source_stamp(db_path)}
+    store.write_json(os.path.join(tmp, 'header.json'), header)
+    store.publish_dir(tmp, index_dir)
+    return index_dir
+
+def read_header(index_dir):
+    return store.read_header(index_dir, FORMAT, VERSION)
+
+def is_fresh(index_dir, db_path, postings=False):
+    header=store.fresh_header(index_dir, db_path, FORMAT, VERSION)
+    return header is not None and (header['postings'] or not postings)
+
+def open_index(index_dir):
+    """Return (words, k, postings or None) as read-only memmaps."""
+    header=read_header(index_dir)
+    words=np.load(os.path.join(index_dir, 'words.npy'), mmap_mode='r')
+    postings=None
+    if header['postings']:
+        postings=(np.load(os.path.join(index_dir, 'post_indptr.npy'), mmap_mode='r'),
+                  np.load(os.path.join(index_dir, 'post_ids.npy'), mmap_mode='r'))
+    return words, header['k'], postings
+
+def open_db(db_path, postings=True):
+    """Open `db_path` as an index dir, or via its (re)built default index."""
+    if os.path.isdir(db_path):
+        return open_index(db_path)
+    index_dir=default_index_dir(db_path)
+    if not is_fresh(index_dir, db_path, postings):
+        try:
+            build_index(db_path, index_dir, postings)
+        except OSError:
+            # read-only location: index in memory only
+            words, k = load_words(db_path)
+            return words, k, (build_postings(words, k) if postings else None)
+    return open_index(index_dir)
+
+def main():
+    args=sys.argv[1:]
+    postings='--no-postings' not in args
+    args=[a for a in args if a!='--no-postings']
+    if len(args) not in (1, 2):
+        print("Usage: dbindex.py [--no-postings] <db_feat> [<index_dir>]", file=sys.stderr)
+        sys.exit(2)
+    print(build_index(args[0], args[1] if len(args)==2 else None, postings))
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Bit-packed feature matrices shared by convert.py and generate_candidates.py.
+
+A packed matrix stores each row of a 0/1 feature matrix as ceil(k/64) uint64
+words (np.packbits order, zero padded), so the subset test
+"query features ⊆ db features" becomes (db & q) == q word by word. On disk it
+is an .npz with `words` and `k`, written to exactly the path given.
+"""
+import numpy as np
+
+def n_words(k):
+    return (k+63)//64
+
+def pack_rows(X):
+    X=np.asarray(X)
+    n, k = X.shape
+    w=n_words(k)
+    b=np.zeros((n, 8*w), dtype=np.uint8)
+    b[:, :(k+7)//8]=np.packbits(X!=0, axis=1)
+    return b.view('<u8')
+
+def unpack_rows(words, k):
+    b=np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    return np.unpackbits(b, axis=1, count=k)
+
+def save_packed(path, X):
+    with open(path, 'wb') as f:
+        np.savez(f, words=pack_rows(X), k=np.int64(X.shape[1]))
+
+def is_packed(obj):
+    return isinstance(obj, np.lib.npyio.NpzFile) and 'words' in obj.files
+
+def load_words(path):
+    """Return (words, k) for a packed .npz or any plain 0/1 matrix file."""
+    try:
+        obj=np.load(path, allow_pickle=False)
+    except Exception:
+        obj=np.loadtxt(path, dtype=np.uint8)
+    if is_packed(obj):
+        return obj['words'], int(obj['k'])
+    if obj.ndim!=2:
+        raise ValueError("Feature vectors must be 2D numpy arrays.")
+    return pack_rows(obj), obj.shape[1]
+
+# ---- inverted index: feature id -> sorted db graph ids ----
+
+def build_postings(words, k):
+    """Return CSR posting lists (indptr[k+1], ids) of 0-based graph ids."""
+    X=unpack_rows(words, k)
+    f, g = np.nonzero(X.T)  # row-major: grouped by feature, graph ids ascending
+    indptr=np.zeros(k+1, dtype=np.int64)
+    np.cumsum(np.bincount(f, minlength=k), out=indptr[1:])
+    return indptr, g.astype(np.int32)
+
+def intersect_postings(indptr, ids, feats, n_db):
+    """Graph ids containing every feature in `feats`, smallest list first."""
+    if len(feats)==0:
+        return np.arange(n_db)
+    lists=sorted((ids[indptr[f]:indptr[f+1]] for f in feats), key=len)
+    cur=lists[0]
+    for other in lists[1:]:
+        if cur.size==0:
+            break
+        pos=np.searchsorted(other, cur)
+        np.minimum(pos, other.size-1, out=pos)
+        cur=cur[other[pos]==cur]
+    return cur
@@ -0,0 +1,52 @@
+"""Greedy discriminative feature selection over pattern-occurrence bitsets.
+
+Given which sample DB graphs contain each candidate pattern, features are
+picked one at a time. Each step takes the candidate that removes the most
+(query, db graph) pairs from the candidate sets of a sample of queries,
+under the same containment test generate_candidates.py applies: graph g stays
+a candidate for query q while every selected feature of q is also in g.
+Correlated features remove few new pairs, so they lose to complementary ones.
+"""
+import os, sys
+import numpy as np
+
+from featbits import pack_rows
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bits import popcount_rows
+
+def greedy_select(occ, k, query_rows=None):
+    """Pick up to k columns of `occ`.
+
+    occ         (n_db, P) 0/1 occurrence matrix of the sample DB graphs
+    query_rows  indices of the rows used as sample queries (default: all)
+    Returns column indices in selection order. Ties, including steps where
+    nothing prunes any more, go to the lower column index, so callers should
+    order candidates by preference.
+    """
+    occ=np.asarray(occ, dtype=np.uint8)
+    n_db, P = occ.shape
+    if query_rows is None:
+        query_rows=np.arange(n_db)
+    qf=occ[query_rows].astype(bool)                  # (Q, P) features of each query
+    has=pack_rows(occ.T)                             # (P, W) db graphs holding feature f
+    # compatible (query, db graph) pairs, packed over db graphs; pad bits stay 0
+    comp=np.repeat(pack_rows(np.ones((1, n_db), dtype=np.uint8)), len(query_rows), axis=0)
+    lacks=~has
+    chosen=[]
+    free=np.ones(P, dtype=bool)
+    for _ in range(min(k, P)):
+        best, best_gain = -1, -1
+        for f in np.flatnonzero(free):
+            qs=qf[:, f]
+            if not qs.any():
+                gain=0
+            else:
+                gain=int(popcount_rows(comp[qs] & lacks[f]).sum())
+            if gain>best_gain:
+                best, best_gain = f, gain
+        chosen.append(int(best))
+        free[best]=False
+        qs=qf[:, best]
+        comp[qs]&=has[best]
+    return chosen
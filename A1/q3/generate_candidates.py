@@ -1,43 +1,147 @@
-﻿import sys
+﻿import os
+import sys
+import argparse
 import numpy as np
 
-def load_features_any(path: str) -> np.ndarray:
-    try:
-        return np.load(path, allow_pickle=False)
-    except Exception:
-        return np.loadtxt(path, dtype=np.uint8)
+from dbindex import open_db, read_header
+from featbits import intersect_postings, load_words, unpack_rows
+from invariants import align_query, invariants_match, invariants_path, load_invariants
 
-def main():
-    if len(sys.argv) != 4:
-        print("Usage: python generate_candidates_fixed.py <db_feat.npy> <query_feat.npy> <out_file>", file=sys.stderr)
-        sys.exit(1)
+def iter_candidates(db: np.ndarray, q: np.ndarray, k: int, mem_mb: float = 256,
+                    postings=None, method: str = "auto", inv=None):
+    """Yield (first query index, list of 0-based candidate id arrays) per block.
+
+    Rows are packed uint64 words. A block holds as many queries as fit in
+    `mem_mb` of B x n_db temporaries; the scan runs word by word, so the
+    temporaries do not grow with k. Identical queries within a block are
+    computed once. `db` may be a memmap: it is read a word column at a
+    time and never copied whole.
 
-    db_path, q_path, out_path = sys.argv[1], sys.argv[2], sys.argv[3]
+    With `postings` (see featbits.build_postings), a query is answered by
+    intersecting its posting lists when that is cheaper than a scan ("auto")
+    or always ("postings"). With `inv` = (db invariants, query invariants in
+    the same columns), see invariants.py, a graph must also dominate the
+    query's invariants, unless no graph passing the bit test does: an empty
+    set would become every graph (see one_based), so such a query keeps its
+    feature candidates.
+    """
+    n_db, n_words = db.shape
+    block = max(1, int(mem_mb * 2**20) // max(1, n_db * 10))
+    if postings is not None:
+        indptr, ids = postings
+        lens = np.diff(indptr)
+    if inv is not None:
+        db_inv, q_inv = inv
+        db_cols = np.ascontiguousarray(db_inv.T)  # one row per invariant
+    for q0 in range(0, q.shape[0], block):
+        rows = q[q0:q0 + block]
+        if inv is not None:
+            # queries are only merged when their invariants match too
+            rows = np.hstack((rows, q_inv[q0:q0 + block].astype(np.uint64)))
+        qb, inv_idx = np.unique(rows, axis=0, return_inverse=True)
+        if inv is not None:
+            qi = qb[:, n_words:].astype(np.int64)
+            qb = np.ascontiguousarray(qb[:, :n_words])
+        res = [None] * qb.shape[0]
+        if postings is not None and method != "scan":
+            qbits = unpack_rows(qb, k)
+            for u in range(qb.shape[0]):
+                feats = np.flatnonzero(qbits[u])
+                if not feats.size:
+                    continue
+                shortest = int(lens[feats].min())
+                if method == "postings" or shortest * feats.size < n_db * n_words:
+                    res[u] = intersect_postings(indptr, ids, feats, n_db)
+                    if inv is not None:
+                        need = np.flatnonzero(qi[u])
+                        dom = res[u][(db_inv[res[u]][:, need] >= qi[u, need]).all(axis=1)]
+                        if dom.size:
+                            res[u] = dom
+        scan = [u for u in range(qb.shape[0]) if res[u] is None]
+        if scan:
+            qs = qb[scan]
+            mask = np.ones((qs.shape[0], n_db), dtype=bool)
+            if inv is not None:
+                # db >= query on every column some query of the block needs
+                qis = qi[scan]
+                dom = np.ones_like(mask)
+                for c in np.flatnonzero(qis.any(axis=0)):
+                    dom &= db_cols[c][None, :] >= qis[:, c, None]
+            for w in range(n_words):
+                # every bit set in the query is set in the db graph
+                qw = qs[:, w, None]
+                mask &= (db[None, :, w] & qw) == qw
+            if inv is not None:
+                dom &= mask
+                hit = dom.any(axis=1)
+                mask[hit] = dom[hit]
+            for r, u in enumerate(scan):
+                res[u] = np.flatnonzero(mask[r])
+        yield q0, [res[u] for u in inv_idx.reshape(-1)]
 
-    db = load_features_any(db_path).astype(np.uint8)
-    q  = load_features_any(q_path).astype(np.uint8)
+def one_based(ids: np.ndarray, n_db: int) -> np.ndarray:
+    cands = ids + 1  # 1-indexed ids
 
-    if db.ndim != 2 or q.ndim != 2:
-        raise ValueError("Feature vectors must be 2D numpy arrays.")
-    if db.shape[1] != q.shape[1]:
-        raise ValueError(f"Feature dim mismatch: db k={db.shape[1]} vs query k={q.shape[1]}")
+    # IMPORTANT FIX: never allow empty candidate set
+    if cands.size == 0:
+        cands = np.arange(1, n_db + 1)
+    return cands
 
-    n_db = db.shape[0]
+def write_candidates(out, q0: int, cands_list, n_db: int) -> None:
+    lines = []
+    for r, ids in enumerate(cands_list):
+        cands = one_based(ids, n_db)
+        lines.append(f"q # {q0 + r + 1}\n")
+        lines.append("c # " + " ".join(map(str, cands.tolist())) + "\n")
+    out.write("".join(lines))
+
+def main():
+    ap = argparse.ArgumentParser(usage="python generate_candidates.py [--mem-mb MB] [--method M] [--db-inv PATH --q-inv PATH | --no-invariants] <db_feat.npy|db_index_dir> <query_feat.npy> <out_file>")
+    ap.add_argument("db_path")
+    ap.add_argument("q_path")
+    ap.add_argument("out_path")
+    ap.add_argument("--mem-mb", type=float, default=256, help="memory budget for one block of queries")
+    ap.add_argument("--method", choices=("auto", "scan", "postings"), default="auto",
+                    help="scan the db matrix, intersect posting lists, or pick per query")
+    ap.add_argument("--db-inv", help="db invariants (default: next to the db features, if convert.py wrote them)")
+    ap.add_argument("--q-inv", help="query invariants (default: next to the query features, likewise)")
+    ap.add_argument("--no-invariants", action="store_true", help="filter on the feature bits only")
+    args = ap.parse_args()
 
-    with open(out_path, "w", encoding="utf-8") as out:
-        for qi in range(q.shape[0]):
-            vq = q[qi]
+    # rows as uint64 words: one word per graph for k <= 64; the db side comes
+    # memory-mapped from its persistent index (built on first use)
+    db, k_db, postings = open_db(args.db_path, postings=args.method != "scan")
+    q, k_q = load_words(args.q_path)
 
-            # necessary condition: vq <= vi component-wise
-            mask = np.all(db >= vq, axis=1)
-            cands = (np.where(mask)[0] + 1).tolist()  # 1-indexed ids
+    if k_db != k_q:
+        raise ValueError(f"Feature dim mismatch: db k={k_db} vs query k={k_q}")
 
-            # IMPORTANT FIX: never allow empty candidate set
-            if len(cands) == 0:
-                cands = list(range(1, n_db + 1))
+    # invariant filter when both sides have them; an index dir points back
+    # to its feature file. Invariants found next to a feature file are only
+    # used if they were saved for its current contents.
+    inv = None
+    if not args.no_invariants:
+        db_feat = read_header(args.db_path)["source"]["path"] if os.path.isdir(args.db_path) else args.db_path
+        db_inv_path = args.db_inv or invariants_path(db_feat)
+        q_inv_path = args.q_inv or invariants_path(args.q_path)
+        if os.path.exists(db_inv_path) and os.path.exists(q_inv_path):
+            stale = [p for p, given, feat in ((db_inv_path, args.db_inv, db_feat), (q_inv_path, args.q_inv, args.q_path))
+                     if not given and not invariants_match(p, feat)]
+            if stale:
+                print(f"ignoring invariants older than their features: {', '.join(stale)}", file=sys.stderr)
+            else:
+                db_inv = load_invariants(db_inv_path)
+                q_inv = load_invariants(q_inv_path)
+                if db_inv[0].shape[0] != db.shape[0] or q_inv[0].shape[0] != q.shape[0]:
+                    raise ValueError(f"Invariant rows do not match the features: {db_inv_path}, {q_inv_path}")
+                inv = (db_inv[0], align_query(q_inv, db_inv))
+        elif args.db_inv or args.q_inv:
+            raise FileNotFoundError(db_inv_path if not os.path.exists(db_inv_path) else q_inv_path)
 
-            out.write(f"q # {qi+1}\n")
-            out.write("c # " + " ".join(map(str, cands)) + "\n")
+    # results are written as each block of queries finishes
+    with open(args.out_path, "w", encoding="utf-8") as out:
+        for q0, cands_list in iter_candidates(db, q, k_db, args.mem_mb, postings, args.method, inv=inv):
+            write_candidates(out, q0, cands_list, db.shape[0])
 
 if __name__ == "__main__":
-    main()
+    main()
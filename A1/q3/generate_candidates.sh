@@ -1,3 +1,3 @@
 #!/usr/bin/env bash
 set -e
-python3 generate_candidates.py "$1" "$2" "$3"
+python3 generate_candidates.py "$@"
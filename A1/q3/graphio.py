@@ -0,0 +1,335 @@
+"""Streaming parser for the gSpan-like graph format shared by the q3 scripts.
+
+    v <id> <node_label>
+    e <src> <dst> <edge_label>
+    #                          ends a graph
+
+iter_graphs yields one graph at a time as compact arrays:
+  labels  int32[n]    label of vertex id i, -1 if no `v` line gave one
+  edges   int32[m, 3] (src, dst, edge_label) in file order
+Vertex ids and labels must be non-negative (ValueError otherwise); edge
+labels may be any int32. Ids are kept as positions unless they are sparse
+(largest id above 2x the vertex count + 64), then they are renumbered in
+ascending order. Edges touching a vertex without a label are dropped (no pattern can
+use them). A `#` closing a graph with no vertices is skipped, and trailing
+lines without a closing `#` do not form a graph. The file is read a few MB
+at a time; a chunk of well-formed lines is tokenised and converted to ints
+as whole arrays, and any other chunk is parsed line by line with the same
+result (or error). Graphs are cut from those rows per block, so the NumPy
+work is not paid per graph; the yielded arrays are views into their block.
+
+open_graphs keeps a binary columnar cache next to the text file
+(`<path>.gcache/`: concatenated vertex labels and edges plus per-graph offset
+arrays, all .npy and memory-mapped on load), so repeated runs skip text
+parsing. The cache is rebuilt when the source's size changes, or when its
+mtime changes and its content hash no longer matches; a rebuilt cache
+replaces the old directory as a whole (common/store.py).
+"""
+import os, sys, json, hashlib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.store import publish_dir, staging_dir, write_json
+
+_EMPTY_EDGES=np.zeros((0, 3), dtype=np.int32)
+_BLOCK=4096  # graphs per array conversion in iter_graphs
+
+def _renumber(vids, e, v0, v1, e0, e1):
+    # sparse ids of one graph (vids[v0:v1], e[e0:e1]) -> ascending positions;
+    # endpoints with no `v` line become -1 so the edge is dropped
+    ids=np.unique(vids[v0:v1])
+    vids[v0:v1]=np.searchsorted(ids, vids[v0:v1])
+    for c in (0, 1):
+        end=e[e0:e1, c]
+        pos=np.minimum(np.searchsorted(ids, end), len(ids)-1)
+        e[e0:e1, c]=np.where(ids[pos]==end, pos, -1)
+    return len(ids)
+
+def _finish_block(vids, vlabs, nv, edges, ne):
+    """Yield the (labels, edges) arrays of a block of parsed graphs."""
+    B=len(nv)
+    vids=np.array(vids, dtype=np.int64)
+    vlabs=np.array(vlabs, dtype=np.int64)
+    if vids.min()<0:
+        raise ValueError(f"Negative vertex id: {vids.min()}")
+    if vlabs.min()<0:
+        raise ValueError(f"Negative vertex label: {vlabs.min()}")
+    if vlabs.max()>=1<<31:
+        raise ValueError(f"Vertex label out of int32 range: {vlabs.max()}")
+    vlabs=vlabs.astype(np.int32)
+    e=np.array(edges, dtype=np.int64).reshape(-1, 3)
+    nv=np.array(nv); ne=np.array(ne)
+    v_off=np.zeros(B+1, dtype=np.int64); np.cumsum(nv, out=v_off[1:])
+    e_off=np.zeros(B+1, dtype=np.int64); np.cumsum(ne, out=e_off[1:])
+    size=np.maximum.reduceat(vids, v_off[:-1])+1  # every graph has a vertex
+    for g in np.flatnonzero(size>2*nv+64).tolist():
+        size[g]=_renumber(vids, e, v_off[g], v_off[g+1], e_off[g], e_off[g+1])
+    l_off=np.zeros(B+1, dtype=np.int64); np.cumsum(size, out=l_off[1:])
+    vgid=np.repeat(np.arange(B), nv)
+    labels=np.full(l_off[-1], -1, dtype=np.int32)
+    labels[l_off[vgid]+vids]=vlabs
+    if len(e):
+        egid=np.repeat(np.arange(B), ne)
+        lim=size[egid]
+        ok=(e[:, 0]>=0) & (e[:, 1]>=0) & (e[:, 0]<lim) & (e[:, 1]<lim)
+        if ok.all():
+            base=l_off[egid]
+            ok=(labels[base+e[:, 0]]>=0) & (labels[base+e[:, 1]]>=0)
+        else:
+            base=l_off[egid[ok]]
+            ok[ok]=(labels[base+e[ok, 0]]>=0) & (labels[base+e[ok, 1]]>=0)
+        if not ok.all():
+            e=e[ok]
+            e_off[1:]=np.cumsum(np.bincount(egid[ok], minlength=B))
+    e=e.astype(np.int32)
+    l_off=l_off.tolist(); e_off=e_off.tolist()
+    for g in range(B):
+        yield labels[l_off[g]:l_off[g+1]], e[e_off[g]:e_off[g+1]]
+
+_CHUNK=1<<22  # bytes read at a time by iter_graphs
+_WS=np.zeros(256, dtype=bool); _WS[[9, 10, 11, 12, 13, 32]]=True  # bytes.split() whitespace
+_DIGIT=np.zeros(256, dtype=bool); _DIGIT[48:58]=True
+_SIGN=np.zeros(256, dtype=bool); _SIGN[[43, 45]]=True
+_TAG=np.full(256, -1, dtype=np.int8); _TAG[[ord('v'), ord('e'), ord('#')]]=[0, 1, 2]
+_WIDTH=np.array([3, 4, 1])  # tokens on a v, e and # line
+_NO_ROWS=(np.zeros(0, dtype=np.int8),)+(np.zeros(0, dtype=np.int64),)*3
+
+def _rows_fast(buf):
+    """(tag, a, b, c) arrays of the lines of `buf` (tag 0/1/2 for v/e/#,
+    then its ints), parsed as whole arrays; None unless every line is a
+    plain `v a b`, `e a b c` or `#` with int32-sized ints, so that the
+    line-by-line parser gives the same rows or error on the rest."""
+    x=np.frombuffer(buf, dtype=np.uint8)
+    if len(x)==0:
+        return _NO_ROWS
+    ws=_WS[x]
+    if (~ws & (x<32)).any():  # other control bytes
+        return None
+    prev=np.ones_like(ws); prev[1:]=ws[:-1]
+    nxt=np.ones_like(ws); nxt[:-1]=ws[1:]
+    s=np.flatnonzero(~ws & prev)  # token starts
+    if len(s)==0:
+        return _NO_ROWS
+    tag=np.where(nxt[s], _TAG[x[s]], -1)
+    is_tag=tag>=0
+    line=np.cumsum(x==10)[s]
+    first=np.ones(len(s), dtype=bool); first[1:]=line[1:]!=line[:-1]
+    # tags start lines and every line starts with a tag
+    if not np.array_equal(is_tag, first):
+        return None
+    t=np.flatnonzero(is_tag)
+    width=np.diff(t, append=len(s))
+    tag=tag[t]
+    if (width!=_WIDTH[tag]).any():
+        return None
+    # the other tokens are ints: digits, with a sign only in front of a digit
+    body=~ws
+    body[s[t]]=False
+    digit=_DIGIT[x]
+    sign=_SIGN[x]
+    if (body & ~digit & ~sign).any():
+        return None
+    next_digit=np.zeros_like(digit); next_digit[:-1]=digit[1:]
+    if (sign & ~(prev & next_digit)).any():
+        return None
+    y=x.copy()
+    y[s[t]]=32
+    vals=np.fromstring(y.tobytes(), dtype=np.int64, sep=' ')
+    if len(vals)!=len(s)-len(t) or (len(vals) and np.abs(vals).max()>=1<<31):
+        return None
+    cnt=width-1
+    off=np.cumsum(cnt)-cnt
+    rows=[tag]
+    for i in range(3):
+        col=np.zeros(len(t), dtype=np.int64)
+        has=cnt>i
+        col[has]=vals[off[has]+i]
+        rows.append(col)
+    return tuple(rows)
+
+def _rows_lines(buf):
+    """_rows_fast for any text, one line at a time."""
+    tags=[]; a=[]; b=[]; c=[]
+    for line in buf.split(b'\n'):
+        parts=line.split()
+        if not parts:
+            continue
+        tag=parts[0]
+        if tag==b'e':
+            a.append(int(parts[1])); b.append(int(parts[2])); c.append(int(parts[3]))
+            tags.append(1)
+        elif tag==b'v':
+            a.append(int(parts[1])); b.append(int(parts[2])); c.append(0)
+            tags.append(0)
+        elif tag==b'#' and len(parts)==1:
+            tags.append(2); a.append(0); b.append(0); c.append(0)
+        else:
+            raise ValueError(f"Unknown line: {line.strip().decode()}")
+    return (np.array(tags, dtype=np.int8),)+tuple(np.array(col, dtype=np.int64) for col in (a, b, c))
+
+def _rows(buf):
+    rows=_rows_fast(buf)
+    return rows if rows is not None else _rows_lines(buf)
+
+def _iter_rows(path, start, end):
+    # rows of [start, end) a chunk of whole lines at a time
+    with open(path, 'rb') as f:
+        f.seek(start)
+        left=None if end is None else end-start
+        tail=b''
+        while True:
+            buf=f.read(_CHUNK if left is None else min(_CHUNK, left))
+            if left is not None:
+                left-=len(buf)
+            if not buf:
+                if tail:
+                    yield _rows(tail)
+                return
+            buf=tail+buf
+            cut=buf.rfind(b'\n')+1
+            tail=buf[cut:]
+            if cut:
+                yield _rows(buf[:cut])
+
+def _graphs(tags, a, b, c):
+    """Yield the graphs of rows that end with a `#`, a block at a time."""
+    hashes=tags==2
+    gid=np.cumsum(hashes)-hashes  # graph of each row
+    n=int(gid[-1])+1
+    is_v=tags==0
+    nv=np.bincount(gid[is_v], minlength=n)
+    # a `#` after no `v` line ends no graph, and drops the edges before it
+    keep=nv>0
+    is_e=(tags==1) & keep[gid]
+    ne=np.bincount(gid[is_e], minlength=n)[keep]
+    nv=nv[keep]
+    vids=a[is_v]; vlabs=b[is_v]
+    edges=np.stack([a[is_e], b[is_e], c[is_e]], axis=1)
+    v_off=np.zeros(len(nv)+1, dtype=np.int64); np.cumsum(nv, out=v_off[1:])
+    e_off=np.zeros(len(ne)+1, dtype=np.int64); np.cumsum(ne, out=e_off[1:])
+    for g0 in range(0, len(nv), _BLOCK):
+        g1=min(g0+_BLOCK, len(nv))
+        v0, v1, e0, e1 = v_off[g0], v_off[g1], e_off[g0], e_off[g1]
+        yield from _finish_block(vids[v0:v1], vlabs[v0:v1], nv[g0:g1], edges[e0:e1], ne[g0:g1])
+
+def iter_graphs(path, start=0, end=None):
+    """Yield (labels, edges) per graph; [start, end) is an optional byte range
+    that must begin and end on graph boundaries (see graph_offsets)."""
+    pending=None  # rows after the last `#` so far
+    for rows in _iter_rows(path, start, end):
+        if pending is not None:
+            rows=tuple(np.concatenate(pair) for pair in zip(pending, rows))
+        hashes=np.flatnonzero(rows[0]==2)
+        if len(hashes)==0:
+            pending=rows
+            continue
+        last=int(hashes[-1])+1
+        pending=tuple(r[last:] for r in rows)
+        yield from _graphs(*(r[:last] for r in rows))
+
+def graph_offsets(path):
+    # byte offset just past each graph's closing '#', i.e. where iter_graphs
+    # yields a graph; len() is the number of graphs
+    offs=[]
+    has_vertex=False
+    pos=0
+    with open(path, 'rb') as f:
+        for line in f:
+            pos+=len(line)
+            s=line.strip()
+            if s==b"#":
+                if has_vertex:
+                    offs.append(pos)
+                has_vertex=False
+            elif s[:1]==b'v':
+                has_vertex=True
+    return offs
+
+# ---- binary columnar cache ----
+
+CACHE_VERSION=2
+
+def cache_dir_for(path):
+    return path+'.gcache'
+
+def _file_hash(path):
+    h=hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1<<22), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def build_cache(path, cache_dir=None):
+    cache_dir=cache_dir or cache_dir_for(path)
+    st=os.stat(path)
+    vl=[]; el=[]
+    v_off=[0]; e_off=[0]
+    for labels, edges in iter_graphs(path):
+        vl.append(labels); el.append(edges)
+        v_off.append(v_off[-1]+len(labels)); e_off.append(e_off[-1]+len(edges))
+    tmp=staging_dir(cache_dir)
+    np.save(os.path.join(tmp, 'vlabels.npy'), np.concatenate(vl) if vl else np.zeros(0, np.int32))
+    np.save(os.path.join(tmp, 'edges.npy'), np.concatenate(el) if el else _EMPTY_EDGES)
+    np.save(os.path.join(tmp, 'v_off.npy'), np.array(v_off, dtype=np.int64))
+    np.save(os.path.join(tmp, 'e_off.npy'), np.array(e_off, dtype=np.int64))
+    meta={'version': CACHE_VERSION, 'n_graphs': len(v_off)-1, 'size': st.st_size,
+          'mtime_ns': st.st_mtime_ns, 'hash': _file_hash(path)}
+    write_json(os.path.join(tmp, 'meta.json'), meta)
+    publish_dir(tmp, cache_dir)
+    return cache_dir
+
+def cache_is_fresh(path, cache_dir=None):
+    meta_path=os.path.join(cache_dir or cache_dir_for(path), 'meta.json')
+    try:
+        with open(meta_path) as f:
+            meta=json.load(f)
+    except (OSError, ValueError):
+        return False
+    st=os.stat(path)
+    if meta.get('version')!=CACHE_VERSION or meta['size']!=st.st_size:
+        return False
+    if meta['mtime_ns']==st.st_mtime_ns:
+        return True
+    # touched but maybe unchanged: trust the content hash, then re-stamp
+    if meta['hash']!=_file_hash(path):
+        return False
+    meta['mtime_ns']=st.st_mtime_ns
+    try:
+        write_json(meta_path, meta)
+    except OSError:
+        pass
+    return True
+
+class GraphStore:
+    """Memory-mapped view of a graph cache; iterates like iter_graphs."""
+
+    def __init__(self, cache_dir):
+        load=lambda name: np.load(os.path.join(cache_dir, name), mmap_mode='r')
+        self.vlabels=load('vlabels.npy')
+        self.edges=load('edges.npy')
+        self.v_off=np.asarray(load('v_off.npy'))
+        self.e_off=np.asarray(load('e_off.npy'))
+
+    def __len__(self):
+        return len(self.v_off)-1
+
+    def __getitem__(self, i):
+        return (np.asarray(self.vlabels[self.v_off[i]:self.v_off[i+1]]),
+                np.asarray(self.edges[self.e_off[i]:self.e_off[i+1]]))
+
+    def iter_range(self, start=0, stop=None):
+        for i in range(start, len(self) if stop is None else stop):
+            yield self[i]
+
+    def __iter__(self):
+        return self.iter_range()
+
+def open_graphs(path, use_cache=True):
+    """Graphs of a text file: a cached GraphStore (built or refreshed as needed)
+    or, without the cache, a fresh iter_graphs stream."""
+    if not use_cache:
+        return iter_graphs(path)
+    cache_dir=cache_dir_for(path)
+    if not cache_is_fresh(path, cache_dir):
+        build_cache(path, cache_dir)
+    return GraphStore(cache_dir)
@@ -0,0 +1,185 @@
+"""gSpan-style frequent connected subgraph mining, up to a given number of edges.
+
+Patterns grow edge by edge by rightmost-path extension of their DFS code and
+carry embedding lists, so support is counted from the embeddings of the
+parent pattern instead of by re-matching. A code is only grown further if it
+is the minimum DFS code of its pattern, which visits every frequent connected
+pattern exactly once.
+
+A DFS code is a tuple of edges (i, j, label_i, edge_label, label_j) over
+pattern vertex ids; i < j is a forward edge, i > j a backward edge. Graphs are
+taken as undirected: self-loops are ignored and parallel edges with the same
+label collapse into one.
+"""
+from collections import defaultdict
+
+class _Graph:
+    __slots__=('labels','adj')
+
+    def __init__(self, labels, edges):
+        # labels/edges as yielded by graphio.iter_graphs
+        self.labels=labels.tolist()
+        adj=[[] for _ in self.labels]
+        seen=set()
+        for u,v,el in edges.tolist():
+            if u==v:
+                continue
+            key=(u,v,el) if u<v else (v,u,el)
+            if key in seen:
+                continue
+            eid=len(seen)
+            seen.add(key)
+            adj[u].append((v,el,eid))
+            adj[v].append((u,el,eid))
+        self.adj=adj
+
+def rightmost_path(code):
+    """Pattern vertex ids on the rightmost path, rightmost vertex first."""
+    path=[]
+    for frm, to, *_ in reversed(code):
+        if frm<to and (not path or to==path[-1]):
+            if not path:
+                path.append(to)
+            path.append(frm)
+    return path
+
+def _extensions(code, graphs, embeddings):
+    """Group rightmost extensions of `code` by their new code edge.
+
+    An embedding is (graph id, pattern vertex -> graph vertex tuple, used
+    edge-id bitmask).
+    """
+    rmpath=rightmost_path(code)
+    rm=rmpath[0]
+    nxt=len(embeddings[0][1])
+    pairs={(min(e[0],e[1]), max(e[0],e[1])) for e in code}
+    back_to=[v for v in rmpath[1:] if (v,rm) not in pairs and (rm,v) not in pairs]
+    plabels=[None]*nxt
+    for i, j, li, _, lj in code:
+        plabels[i]=li
+        plabels[j]=lj
+    out=defaultdict(list)
+    for emb in embeddings:
+        gid, vmap, used = emb
+        g=graphs[gid]
+        labels=g.labels
+        grm=vmap[rm]
+        mapped=set(vmap)
+        # backward: rightmost vertex to an unlinked vertex on the rightmost path
+        if back_to:
+            for to, el, eid in g.adj[grm]:
+                if used>>eid & 1:
+                    continue
+                for v in back_to:
+                    if vmap[v]==to:
+                        out[(rm, v, plabels[rm], el, plabels[v])].append((gid, vmap, used | 1<<eid))
+        # forward: any rightmost-path vertex to a new vertex
+        for v in rmpath:
+            for to, el, eid in g.adj[vmap[v]]:
+                if to in mapped:
+                    continue
+                out[(v, nxt, plabels[v], el, labels[to])].append((gid, vmap+(to,), used | 1<<eid))
+    return out
+
+def _pattern_graph(code):
+    labels={}
+    adj=defaultdict(list)
+    for eid, (i, j, li, el, lj) in enumerate(code):
+        labels[i]=li
+        labels[j]=lj
+        adj[i].append((j,el,eid))
+        adj[j].append((i,el,eid))
+    return labels, adj
+
+def is_min(code):
+    """True if `code` is the minimum DFS code of the pattern it describes."""
+    labels, adj = _pattern_graph(code)
+    # every embedding of the growing minimum code into the pattern itself
+    first=min((0, 1, labels[u], el, labels[v]) for u in adj for v, el, _ in adj[u])
+    if first!=code[0]:
+        return False
+    embs=[((u,v), 1<<eid) for u in adj for v, el, eid in adj[u]
+          if (labels[u], el, labels[v])==first[2:]]
+    for k in range(1, len(code)):
+        prefix=code[:k]
+        rmpath=rightmost_path(prefix)
+        rm=rmpath[0]
+        nxt=len(embs[0][0])
+        # a backward edge is smaller than any forward one: smallest target, then label
+        best=None
+        for vmap, used in embs:
+            for to, el, eid in adj[vmap[rm]]:
+                if used>>eid & 1:
+                    continue
+                for v in rmpath[1:]:
+                    if vmap[v]==to:
+                        cand=(v, el)
+                        if best is None or cand<best:
+                            best=cand
+        if best is not None:
+            ext=(rm, best[0], labels[embs[0][0][rm]], best[1], labels[embs[0][0][best[0]]])
+            if ext!=code[k]:
+                return False
+            embs=[(vmap, used | 1<<eid) for vmap, used in embs for to, el, eid in adj[vmap[rm]]
+                  if not used>>eid & 1 and to==vmap[best[0]] and el==best[1]]
+            continue
+        # forward: deepest source on the rightmost path, then edge label, then target label
+        for v in rmpath:
+            cands=[(el, labels[to]) for vmap, used in embs for to, el, _ in adj[vmap[v]] if to not in vmap]
+            if cands:
+                el, lt = min(cands)
+                ext=(v, nxt, labels[embs[0][0][v]], el, lt)
+                if ext!=code[k]:
+                    return False
+                embs=[(vmap+(to,), used | 1<<eid) for vmap, used in embs for to, e, eid in adj[vmap[v]]
+                      if to not in vmap and e==el and labels[to]==lt]
+                break
+        else:
+            return False
+    return True
+
+def mine(graph_stream, min_sup, max_edges):
+    """Yield (code, support, sorted graph ids) for every connected pattern
+    with 1..max_edges edges occurring in at least `min_sup` graphs.
+
+    Graphs are read once into a compact adjacency form; 1-edge patterns are
+    expanded one at a time, so only one subtree's embeddings are alive.
+    """
+    graphs=[_Graph(labels, edges) for labels, edges in graph_stream]
+    # frequent single edges, canonical as (label_u <= label_v)
+    edge_gids=defaultdict(set)
+    for gid, g in enumerate(graphs):
+        for u, nbrs in enumerate(g.adj):
+            lu=g.labels[u]
+            for v, el, _ in nbrs:
+                lv=g.labels[v]
+                if lu<=lv:
+                    edge_gids[(0, 1, lu, el, lv)].add(gid)
+    for first in sorted(edge_gids):
+        gids=edge_gids[first]
+        if len(gids)<min_sup:
+            continue
+        _, _, lu, el, lv = first
+        embs=[]
+        for gid in sorted(gids):
+            g=graphs[gid]
+            for u, nbrs in enumerate(g.adj):
+                if g.labels[u]!=lu:
+                    continue
+                for v, e, eid in nbrs:
+                    if e==el and g.labels[v]==lv:
+                        embs.append((gid, (u,v), 1<<eid))
+        yield from _grow((first,), embs, graphs, min_sup, max_edges)
+
+def _grow(code, embs, graphs, min_sup, max_edges):
+    gids=sorted({e[0] for e in embs})
+    yield code, len(gids), gids
+    if len(code)>=max_edges:
+        return
+    for ext, child in sorted(_extensions(code, graphs, embs).items()):
+        if len({e[0] for e in child})<min_sup:
+            continue
+        new=code+(ext,)
+        if not is_min(new):
+            continue
+        yield from _grow(new, child, graphs, min_sup, max_edges)
@@ -1,209 +1,505 @@
 #!/usr/bin/env python3
-import sys, math
-from collections import defaultdict
-
-# Graph parser for gSpan-like format:
-# v <id> <node_label>
-# e <src> <dst> <edge_label>
-# # ends graph
-def parse_graphs(path):
-    graphs=[]
-    node_labels={}
-    edges=[]  # list of (u,v,el)
-    with open(path,'r') as f:
-        for line in f:
-            s=line.strip()
-            if not s:
-                continue
-            if s=="#":
-                # finalize
-                if node_labels:
-                    graphs.append((node_labels, edges))
-                node_labels={}
-                edges=[]
-                continue
-            parts=s.split()
-            if parts[0]=='v':
-                node_labels[int(parts[1])] = int(parts[2])
-            elif parts[0]=='e':
-                edges.append((int(parts[1]), int(parts[2]), int(parts[3])))
-            else:
-                raise ValueError(f"Unknown line: {s}")
-    return graphs
-
-def canonical_edge(lu, el, lv):
-    # undirected canonical (by endpoint labels, then edge label)
-    if lu < lv:
-        return (lu, el, lv)
-    if lu > lv:
-        return (lv, el, lu)
-    return (lu, el, lv)
+import math, argparse, hashlib, heapq, random
+import numpy as np
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 
+from graphio import GraphStore, open_graphs, iter_graphs, graph_offsets
+import gspan
+from convert import CompiledGraph, FeatureMatcher
+from minedpat import top_mined, load_label_map
+from featbits import save_packed
+from featselect import greedy_select
 
-def graph_signature(node_labels, edges):
+def graph_signature(labels, edges):
     """Create an order-invariant signature for exact-duplicate detection.
 
     We consider two graphs duplicates if they have the same set of labeled vertices
     (by vertex id -> label) and the same multiset of labeled edges (undirected).
-    This is sufficient for removing exact duplicates in the provided dataset while
-    preserving the original ordering of first occurrences.
+    The signature is the bytes of the label array followed by the edge array
+    normalised to (min, max, label) rows in lexicographic order.
     """
-    # vertex labels: order-invariant
-    v_sig = tuple(sorted(node_labels.items()))
-    # edges: order-invariant, treat as undirected; keep multiplicity if any
-    e_norm = []
-    for u, v, el in edges:
-        a, b = (u, v) if u <= v else (v, u)
-        e_norm.append((a, b, el))
-    e_sig = tuple(sorted(e_norm))
-    return (v_sig, e_sig)
-
-def dedup_graphs_preserve_order(graphs):
-    """Remove exact duplicate graphs while preserving the first occurrence order."""
-    seen = set()
-    out = []
-    for g in graphs:
-        sig = graph_signature(g[0], g[1])
-        if sig in seen:
-            continue
-        seen.add(sig)
-        out.append(g)
-    return out
-
-def mine_patterns(graphs, min_sup_cnt, max_patterns=200000):
-    edge_sup=defaultdict(int)
-    path2_sup=defaultdict(int)
-    tri_sup=defaultdict(int)
-
-    for node_labels, edges in graphs:
-        # build undirected adjacency: node -> list[(nbr, edge_label)]
-        adj=defaultdict(list)
-        for u,v,el in edges:
-            adj[u].append((v,el))
-        # EDGE patterns per-graph
-        seen_edge=set()
-        for u,v,el in edges:
-            if u not in node_labels or v not in node_labels:
-                continue
-            pat = canonical_edge(node_labels[u], el, node_labels[v])
-            seen_edge.add(pat)
-        for pat in seen_edge:
-            edge_sup[pat]+=1
-
-        # PATH2 patterns per-graph: a -e1- b -e2- c, b is center
-        seen_path=set()
-        for b, neighs in adj.items():
-            lb=node_labels.get(b)
-            if lb is None:
+    e = np.empty_like(edges)
+    np.minimum(edges[:, 0], edges[:, 1], out=e[:, 0])
+    np.maximum(edges[:, 0], edges[:, 1], out=e[:, 1])
+    e[:, 2] = edges[:, 2]
+    e = e[np.lexsort((e[:, 2], e[:, 1], e[:, 0]))]
+    return np.int64(len(labels)).tobytes() + labels.astype(np.int32).tobytes() + e.astype(np.int32).tobytes()
+
+def _signatures(vlabels, v_off, edges, e_off):
+    # graph_signature of each graph of a block given as concatenated arrays
+    # and offsets from the block start, with the edge normalisation and sort
+    # done once over the block
+    vl = np.asarray(vlabels, dtype=np.int32).tobytes()
+    e = np.array(edges, dtype=np.int32).reshape(-1, 3)
+    gid = np.repeat(np.arange(len(e_off) - 1), np.diff(e_off))
+    a = np.minimum(e[:, 0], e[:, 1])
+    b = np.maximum(e[:, 0], e[:, 1])
+    e[:, 0] = a
+    e[:, 1] = b
+    eb = e[np.lexsort((e[:, 2], b, a, gid))].tobytes()
+    v_off = v_off.tolist()
+    e_off = e_off.tolist()
+    for i in range(len(v_off) - 1):
+        yield (np.int64(v_off[i + 1] - v_off[i]).tobytes()
+               + vl[v_off[i] * 4:v_off[i + 1] * 4] + eb[e_off[i] * 12:e_off[i + 1] * 12])
+
+def _store_signatures(store, block=1<<16):
+    # graph_signature for every graph of a graphio.GraphStore
+    for g0 in range(0, len(store), block):
+        g1 = min(g0 + block, len(store))
+        v_off = store.v_off[g0:g1 + 1]
+        e_off = store.e_off[g0:g1 + 1]
+        yield from _signatures(store.vlabels[v_off[0]:v_off[-1]], v_off - v_off[0],
+                               store.edges[e_off[0]:e_off[-1]], e_off - e_off[0])
+
+def _stream_signatures(graphs, block=4096):
+    # (graph, graph_signature) for every graph of a stream, a block at a time
+    for chunk in _chunks(graphs, block):
+        v_off = np.zeros(len(chunk) + 1, dtype=np.int64)
+        e_off = np.zeros(len(chunk) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l, _ in chunk], out=v_off[1:])
+        np.cumsum([len(e) for _, e in chunk], out=e_off[1:])
+        yield from zip(chunk, _signatures(np.concatenate([l for l, _ in chunk]), v_off,
+                                          np.concatenate([e for _, e in chunk]), e_off))
+
+def dedup_graphs_preserve_order(graphs, rep=None, path=None):
+    """Drop exact duplicate graphs from a stream, keeping first occurrences in order.
+
+    `graphs` is a GraphStore or the iter_graphs stream of the file `path`.
+    Graphs are keyed by a 16-byte blake2b digest of their signature, mapped to
+    the input position of the kept graph; full signatures are only compared
+    when a digest is seen again, by re-reading the kept graph (from the store,
+    or its byte range of `path`), so no graph is held. Signatures are computed
+    per block of graphs. If `rep` is a list, the position among the kept
+    graphs of each input graph (or of its first occurrence) is appended to it.
+    """
+    seen = {}  # digest -> kept index, or a list of them on a digest collision
+    store = isinstance(graphs, GraphStore)
+    if not store and path is None:
+        raise TypeError("a graph stream needs the path of its file")
+    pairs = zip(graphs, _store_signatures(graphs)) if store else _stream_signatures(graphs)
+    first = []  # kept index -> input index
+    offs = None  # graph_offsets(path), read on the first digest hit
+
+    def stored(i):
+        nonlocal offs
+        if store:
+            return graphs[i]
+        if offs is None:
+            offs = graph_offsets(path)
+        return next(iter_graphs(path, offs[i - 1] if i else 0, offs[i]))
+
+    for i, (g, sig) in enumerate(pairs):
+        d = hashlib.blake2b(sig, digest_size=16).digest()
+        bucket = seen.get(d)
+        if bucket is not None:
+            entries = bucket if isinstance(bucket, list) else [bucket]
+            dup = next((j for j in entries if graph_signature(*stored(first[j])) == sig), None)
+            if dup is not None:
+                if rep is not None:
+                    rep.append(dup)
                 continue
-            # consider unordered pairs of incident edges (including same neighbor via different labels)
-            m=len(neighs)
-            for i in range(m):
-                a, e1 = neighs[i]
-                la=node_labels.get(a)
-                if la is None: 
-                    continue
-                for j in range(i+1, m):
-                    c, e2 = neighs[j]
-                    lc=node_labels.get(c)
-                    if lc is None:
-                        continue
-                    # canonicalize ends to remove symmetry: order (la,e1) vs (lc,e2) by tuple
-                    left=(la,e1)
-                    right=(lc,e2)
-                    if left <= right:
-                        pat=('PATH2', la, e1, lb, e2, lc)
-                    else:
-                        pat=('PATH2', lc, e2, lb, e1, la)
-                    seen_path.add(pat)
-        for pat in seen_path:
-            path2_sup[pat]+=1
-
-        # TRI patterns per-graph: triangle among nodes (x,y,z) with edge labels
-        # Build neighbor sets with edge labels map for fast lookups
-        nbrs=defaultdict(set)
-        el_map=defaultdict(dict)  # u -> {v: el} (take first if multi-edge)
+            seen[d] = entries + [len(first)]
+        else:
+            seen[d] = len(first)
+        if rep is not None:
+            rep.append(len(first))
+        first.append(i)
+        yield g
+
+# Patterns are counted as packed ints: a type tag above 32-bit fields, each
+# a label offset by BIAS so that any int32 label fits, e.g. PATH2
+# (la,e1,lb,e2,lc) -> 1<<192 | la'<<128 | e1'<<96 | lb'<<64 | e2'<<32 | lc'
+# with x'=x+BIAS. They hash faster than tuples and sort by type, then fields.
+BIAS=1<<31
+EDGE_T=0
+PATH2_T=1<<192
+TRI_T=2<<192
+_TYPES={0: ('EDGE', 3), 1: ('PATH2', 5), 2: ('TRI', 6)}
+
+def decode_pattern(pid):
+    name, nf = _TYPES[pid>>192]
+    return (name,)+tuple(((pid>>(32*i)) & 0xFFFFFFFF)-BIAS for i in range(nf-1, -1, -1))
+
+def _biased(labels, edges):
+    # vertex labels and edge list with labels offset by BIAS, as Python ints
+    e=edges.astype(np.int64)
+    e[:, 2]+=BIAS
+    return (labels.astype(np.int64)+BIAS).tolist(), e.tolist()
+
+def edge_key(la, el, lb):
+    # packed canonical EDGE id of biased labels
+    return EDGE_T | la<<64 | el<<32 | lb if la<=lb else EDGE_T | lb<<64 | el<<32 | la
+
+def graph_edge_patterns(labels, edges):
+    """Set of packed EDGE pattern ids occurring in one graph."""
+    node_labels, edges = _biased(labels, edges)
+    return {edge_key(node_labels[u], el, node_labels[v]) for u,v,el in edges}
+
+def graph_patterns(labels, edges, useful=None):
+    """Set of packed pattern ids occurring in one graph.
+
+    Without `useful`, all EDGE/PATH2/TRI patterns. With a set of EDGE ids,
+    only the PATH2/TRI patterns whose sub-edges are all in it (Apriori:
+    a pattern is no more frequent than any of its edges).
+
+    Presence is decided exactly as convert.FeatureMatcher decides it, so the
+    graphs counted for a pattern are the graphs its feature column marks:
+    edges are undirected, the two ends of a PATH2 are distinct vertices, and a
+    TRI is any choice of one edge label between each pair of its three
+    distinct vertices (parallel edges give several), in its smallest ordering.
+    """
+    # vertex id -> biased label (BIAS-1 if absent); endpoints are always
+    # labelled, see graphio
+    node_labels, edges = _biased(labels, edges)
+    if useful is not None:
+        # filtered once: only the useful edges take part in PATH2/TRI
+        edges=[(u,v,el) for u,v,el in edges if edge_key(node_labels[u], el, node_labels[v]) in useful]
+    if not edges:
+        return set()
+    n=len(node_labels)
+    seen=set()
+    # undirected adjacency: node -> list[(nbr, edge_label)], one entry per endpoint
+    adj=[[] for _ in range(n)]
+    els={}  # u*n+v -> distinct edge labels between u != v (TRI sides), both ways
+    for u,v,el in edges:
+        adj[u].append((v,el))
+        adj[v].append((u,el))
+        if u!=v:
+            side=els.setdefault(u*n+v, [])
+            if el not in side:
+                side.append(el)
+                els[v*n+u]=side
+    if useful is None:
+        # EDGE patterns per-graph
         for u,v,el in edges:
-            nbrs[u].add(v)
-            if v not in el_map[u]:
-                el_map[u][v]=el
-        seen_tri=set()
-        nodes=list(node_labels.keys())
-        # iterate u, v>u, w>v triangles using neighbor intersections
-        for u in nodes:
-            for v in nbrs.get(u, ()):
-                if v <= u: 
+            seen.add(edge_key(node_labels[u], el, node_labels[v]))
+
+    # PATH2 patterns per-graph: a -e1- b -e2- c, b is center, a != c
+    for b in range(n):
+        neighs=adj[b]
+        if not neighs:
+            continue
+        lb=node_labels[b]
+        # end key (label<<32 | edge label) -> distinct neighbours reaching it
+        at=defaultdict(set)
+        for a,e in neighs:
+            at[node_labels[a]<<32 | e].add(a)
+        keys=sorted(at)
+        lb<<=64
+        for i in range(len(keys)):
+            left=keys[i]
+            sl=at[left]
+            head=PATH2_T | left<<96 | lb
+            # the right end is stored as (e2, lc)
+            if len(sl)>=2:
+                seen.add(head | (left&0xFFFFFFFF)<<32 | left>>32)
+                for right in keys[i+1:]:
+                    seen.add(head | (right&0xFFFFFFFF)<<32 | right>>32)
+            else:
+                # a single left neighbour needs another one on the right
+                for right in keys[i+1:]:
+                    if at[right]!=sl:
+                        seen.add(head | (right&0xFFFFFFFF)<<32 | right>>32)
+
+    # TRI patterns per-graph over the simple undirected graph
+    fwd=[key for key in els if key//n<key%n]
+    if len(fwd)<3:
+        return seen
+    # orient each edge from lower to higher (degree, id) rank, so every
+    # triangle is found once and no vertex has more than O(sqrt(m)) out-edges
+    deg=[0]*n
+    for key in fwd:
+        deg[key//n]+=1
+        deg[key%n]+=1
+    out=[[] for _ in range(n)]
+    for key in fwd:
+        u, v = divmod(key, n)
+        if (deg[u],u)<(deg[v],v):
+            out[u].append(v)
+        else:
+            out[v].append(u)
+    mark=[-1]*n
+    for x in range(n):
+        ox=out[x]
+        if len(ox)<2:
+            continue
+        for y in ox:
+            mark[y]=x
+        for y in ox:
+            for z in out[y]:
+                if mark[z]!=x:
                     continue
-                inter = nbrs.get(u,set()).intersection(nbrs.get(v,set()))
-                for w in inter:
-                    if w <= v:
-                        continue
-                    # edges (u,v),(u,w),(v,w) must exist both directions already in nbrs
-                    lu,lv,lw = node_labels[u], node_labels[v], node_labels[w]
-                    el_uv = el_map[u].get(v)
-                    el_uw = el_map[u].get(w)
-                    el_vw = el_map[v].get(w)
-                    if el_uv is None or el_uw is None or el_vw is None:
-                        continue
-                    # canonicalize by sorting nodes by labels then tie-break by ids
-                    trip = sorted([(lu,u),(lv,v),(lw,w)])
-                    (l1,n1),(l2,n2),(l3,n3)=trip
-                    # retrieve edge labels between n1-n2, n1-n3, n2-n3 in undirected way
-                    def get_el(a,b):
-                        return el_map[a].get(b, el_map[b].get(a))
-                    e12=get_el(n1,n2); e13=get_el(n1,n3); e23=get_el(n2,n3)
-                    if e12 is None or e13 is None or e23 is None:
-                        continue
-                    pat=('TRI', l1, e12, l2, e13, l3, e23)
-                    seen_tri.add(pat)
-        for pat in seen_tri:
-            tri_sup[pat]+=1
-
-    # filter by min support
-    def filt(d):
-        return {k:v for k,v in d.items() if v>=min_sup_cnt}
-
-    edge_sup=filt(edge_sup)
-    path2_sup=filt(path2_sup)
-    tri_sup=filt(tri_sup)
-
-    # score patterns by support*(1-support) to favor mid-frequency
+                lx, ly, lz = node_labels[x], node_labels[y], node_labels[z]
+                for exy in els[x*n+y]:
+                    for exz in els[x*n+z]:
+                        for eyz in els[y*n+z]:
+                            # canonical form: smallest (l1,e12,l2,e13,l3,e23) over the 6 orderings
+                            l1, e12, l2, e13, l3, e23 = min(
+                                (lx,exy,ly,exz,lz,eyz), (lx,exz,lz,exy,ly,eyz),
+                                (ly,exy,lx,eyz,lz,exz), (ly,eyz,lz,exy,lx,exz),
+                                (lz,exz,lx,eyz,ly,exy), (lz,eyz,ly,exz,lx,exy))
+                            seen.add(TRI_T | l1<<160 | e12<<128 | l2<<96 | e13<<64 | l3<<32 | e23)
+    return seen
+
+def count_patterns(graphs, useful=None, edges_only=False, tids=False, base=0):
+    """Per-pattern graph support over `graphs`; returns (counts, n_graphs).
+
+    With `tids`, each pattern maps to the ascending list of positions
+    (from `base`) of the graphs containing it instead of their count.
+    """
+    sup=defaultdict(list) if tids else defaultdict(int)
+    n=0
+    for labels, edges in graphs:
+        pats=graph_edge_patterns(labels, edges) if edges_only else graph_patterns(labels, edges, useful)
+        if tids:
+            i=base+n
+            for pid in pats:
+                sup[pid].append(i)
+        else:
+            for pid in pats:
+                sup[pid]+=1
+        n+=1
+    return sup, n
+
+def _chunks(graphs, size):
+    chunk=[]
+    for g in graphs:
+        chunk.append(g)
+        if len(chunk)==size:
+            yield chunk
+            chunk=[]
+    if chunk:
+        yield chunk
+
+_worker_args=None
+
+def _init_worker(useful, edges_only, tids):
+    global _worker_args
+    _worker_args=(useful, edges_only, tids)
+
+def _count_chunk(chunk, base):
+    return count_patterns(chunk, *_worker_args, base=base)
+
+def count_patterns_parallel(graphs, workers, useful=None, edges_only=False, tids=False, chunk_size=2000):
+    """count_patterns as map-reduce: chunks of the graph stream are counted in
+    worker processes and the local counters merged here. Chunks merge in
+    stream order, so graph id lists stay ascending."""
+    sup=defaultdict(list) if tids else defaultdict(int)
+    n=0
+    def merge(fut):
+        nonlocal n
+        local, m = fut.result()
+        n+=m
+        for pid, c in local.items():
+            sup[pid]+=c
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(useful, edges_only, tids)) as ex:
+        pending=deque()
+        base=0
+        for chunk in _chunks(graphs, chunk_size):
+            pending.append(ex.submit(_count_chunk, chunk, base))
+            base+=len(chunk)
+            if len(pending)>=2*workers:  # bound graphs in flight
+                merge(pending.popleft())
+        while pending:
+            merge(pending.popleft())
+    return sup, n
+
+def _score(s, n):
+    frac=s/n
+    return frac*(1-frac)
+
+def mine_patterns(graphs, min_sup_cnt, k=50, workers=1, tids=False):
+    """Top-k patterns as (score, pattern tuple, support), best first.
+
+    `graphs` must be re-iterable: EDGE support is counted in a first pass; its
+    k-th best score bounds the final k-th score from below, so PATH2/TRI are
+    then only counted when every sub-edge could still reach a top-k score
+    (support s scores at most s/n*(1-s/n) below n/2) and min_sup_cnt.
+    With `tids`, each entry also carries the int32 array of positions in
+    `graphs` of the graphs containing the pattern.
+    """
+    def count(useful=None, edges_only=False):
+        if workers>1:
+            return count_patterns_parallel(graphs, workers, useful, edges_only, tids)
+        return count_patterns(graphs, useful, edges_only, tids)
+
+    edge_sup, n = count(edges_only=True)
+    if n==0:
+        raise RuntimeError("No graphs parsed")
+    if tids:
+        edge_tids, edge_sup = edge_sup, {pid: len(g) for pid, g in edge_sup.items()}
+
+    def bound(s):
+        # best score reachable by a pattern with support <= s
+        return _score(min(s, n/2), n)
+
+    edge_scores=[_score(s, n) for s in edge_sup.values() if s>=min_sup_cnt]
+    tau=heapq.nlargest(k, edge_scores)[-1] if len(edge_scores)>=k else 0.0
+    useful={pid for pid, s in edge_sup.items() if s>=min_sup_cnt and bound(s)>=tau}
+    grown, _ = count(useful=useful)
+    if tids:
+        grown_tids, grown = grown, {pid: len(g) for pid, g in grown.items()}
+
+    # filter by min support, score patterns by support*(1-support) to favor mid-frequency
+    scored=((_score(s, n), pid, s) for sup in (edge_sup, grown) for pid, s in sup.items() if s>=min_sup_cnt)
+    # high score, then smaller support, then EDGE < PATH2 < TRI and label order
+    top=heapq.nlargest(k, scored, key=lambda x:(x[0], -x[2], -x[1]))
+    if tids:
+        return [(score, decode_pattern(pid), s,
+                 np.array(edge_tids[pid] if pid in edge_tids else grown_tids[pid], dtype=np.int32))
+                for score, pid, s in top]
+    return [(score, decode_pattern(pid), s) for score, pid, s in top]
+
+def mine_gspan(graphs, min_sup_frac, max_edges, k=50, tids=False):
+    """Top-k gSpan patterns (gspan.py) of up to `max_edges` edges, scored like
+    mine_patterns, as ('GRAPH', i, j, li, el, lj, ...) with their minimum DFS
+    code flattened (GRAPH, not EDGE, even for one edge: gSpan ignores
+    self-loops, EDGE features do not). `tids` as in mine_patterns."""
+    graphs=list(graphs)
     n=len(graphs)
-    scored=[]
-    for pat,sup in edge_sup.items():
-        frac=sup/n
-        scored.append( (frac*(1-frac), ('EDGE', pat[0], pat[1], pat[2]), sup) )
-    for pat,sup in path2_sup.items():
-        frac=sup/n
-        # pat includes 'PATH2' already, but store without duplication
-        scored.append( (frac*(1-frac), pat, sup) )
-    for pat,sup in tri_sup.items():
-        frac=sup/n
-        scored.append( (frac*(1-frac), pat, sup) )
-
-    scored.sort(key=lambda x:(-x[0], x[2]))  # high score, then smaller support
-    return scored
+    if n==0:
+        raise RuntimeError("No graphs parsed")
+    min_sup=max(1, math.ceil(min_sup_frac*n))
+    scored=((_score(s, n), code, s, gids) for code, s, gids in gspan.mine(graphs, min_sup, max_edges))
+    # high score, then smaller support; equal keys keep mining order
+    top=heapq.nlargest(k, scored, key=lambda x:(x[0], -x[2]))
+    if tids:
+        return [(score, ('GRAPH',)+tuple(x for e in code for x in e), s, np.array(gids, dtype=np.int32))
+                for score, code, s, gids in top]
+    return [(score, ('GRAPH',)+tuple(x for e in code for x in e), s) for score, code, s, _ in top]
+
+def attach_tids(graphs, top):
+    """Add to each (score, pattern, support) entry the int32 array of
+    positions in `graphs` of the graphs containing it, by matching."""
+    matcher=FeatureMatcher([pat for _, pat, _ in top])
+    tids=[[] for _ in top]
+    for i, (labels, edges) in enumerate(graphs):
+        for j in matcher.match(CompiledGraph(labels, edges)):
+            tids[j].append(i)
+    return [entry+(np.array(t, dtype=np.int32),) for entry, t in zip(top, tids)]
+
+def sample_graphs(graphs, size, seed=0):
+    """Uniform reservoir sample of up to `size` graphs from a stream."""
+    rng=random.Random(seed)
+    sample=[]
+    for i, g in enumerate(graphs):
+        if i<size:
+            sample.append(g)
+        else:
+            r=rng.randrange(i+1)
+            if r<size:
+                sample[r]=g
+    return sample
+
+def select_greedy(pool, n, k, sample_size=2000, n_queries=1000, seed=0):
+    """Choose k of the `pool` patterns (mined with tids, over n graphs) with
+    featselect.greedy_select, using a sample of the graphs as DB and its
+    first rows as queries; occurrences come from the graph id arrays."""
+    sample=np.array(sample_graphs(range(n), sample_size, seed), dtype=np.int32)
+    occ=np.zeros((len(sample), len(pool)), dtype=np.uint8)
+    for j, entry in enumerate(pool):
+        occ[:, j]=np.isin(sample, entry[3])
+    chosen=greedy_select(occ, k, np.arange(min(n_queries, len(sample))))
+    return [pool[c] for c in chosen]
+
+def db_feature_matrix(top, rep):
+    """0/1 (len(rep), k) matrix of the mined patterns, as convert.py writes it
+    for the same feature file: rep[i] is the position among the mined
+    (deduplicated) graphs of input graph i, see dedup_graphs_preserve_order."""
+    rep=np.asarray(rep, dtype=np.int64)
+    X=np.zeros((int(rep.max())+1 if len(rep) else 0, len(top)), dtype=np.uint8)
+    for j, entry in enumerate(top):
+        X[entry[3], j]=1
+    return X[rep]
+
+class DedupGraphs:
+    """Re-iterable deduplicated graph stream of a dataset file. The first
+    complete pass parses and deduplicates the file; later passes read it
+    again and skip the duplicates that `rep` records, so only `rep` is kept
+    in memory. `rep` maps the input graphs to their kept position once a
+    pass has completed."""
+
+    def __init__(self, path, cache=False):
+        self.path=path
+        self.cache=cache
+        self.rep=None
+
+    def __iter__(self):
+        if self.rep is not None:
+            return self._kept()
+        return self._first_pass()
+
+    def _first_pass(self):
+        rep=[]
+        yield from dedup_graphs_preserve_order(open_graphs(self.path, self.cache), rep, self.path)
+        self.rep=rep
+
+    def _kept(self):
+        # input graph i is kept iff it is the first to reach its kept position
+        nxt=0
+        for g, r in zip(open_graphs(self.path, self.cache), self.rep):
+            if r==nxt:
+                nxt+=1
+                yield g
 
 def main():
-    if len(sys.argv)!=3:
-        print("Usage: identify_fixed.py <path_graph_dataset> <path_discriminative_subgraphs>", file=sys.stderr)
-        sys.exit(2)
-    in_path=sys.argv[1]
-    out_path=sys.argv[2]
-
-    graphs=parse_graphs(in_path)
-    graphs = dedup_graphs_preserve_order(graphs)
-    if not graphs:
-        raise RuntimeError("No graphs parsed")
+    ap=argparse.ArgumentParser(usage="identify.py [--cache] [--workers N] [-k K] [--min-sup S] [--miner gspan --max-edges L --gspan-sup F] [--miner import --patterns FILE [--label-map JSON]] [--select greedy --pool M --sample N] [--db-features PATH [--packed]] <path_graph_dataset> <path_discriminative_subgraphs>")
+    ap.add_argument('in_path')
+    ap.add_argument('out_path')
+    ap.add_argument('--cache', action='store_true', help="read graphs through the binary cache (graphio.open_graphs)")
+    ap.add_argument('--workers', type=int, default=1, help="count pattern support in N processes")
+    ap.add_argument('-k', type=int, default=50, help="number of features to write")
+    ap.add_argument('--min-sup', type=int, default=1, help="minimum support count (default 1 allows rare patterns to reach k)")
+    ap.add_argument('--miner', choices=('basic', 'gspan', 'import'), default='basic',
+                    help="EDGE/PATH2/TRI counting, gSpan pattern growth, or patterns mined by Gaston/gSpan")
+    ap.add_argument('--max-edges', type=int, default=4, help="gspan: largest pattern size in edges")
+    ap.add_argument('--gspan-sup', type=float, default=0.05, help="gspan: minimum support as a fraction of graphs")
+    ap.add_argument('--patterns', help="import: Gaston or gSpan results file (see minedpat.py)")
+    ap.add_argument('--label-map', help="import: q2/graphconv.py label dictionary of the mined input")
+    ap.add_argument('--mined-graphs', type=int, help="import: graphs in the mined dataset (default: in the input, duplicates included)")
+    ap.add_argument('--select', choices=('score', 'greedy'), default='score',
+                    help="keep the k best-scored patterns, or pick k greedily for candidate pruning")
+    ap.add_argument('--pool', type=int, help="greedy: best-scored patterns to choose from (default 10*k)")
+    ap.add_argument('--sample', type=int, default=2000, help="greedy: sample graphs used as DB and queries")
+    ap.add_argument('--queries', type=int, default=1000, help="greedy: sample graphs also used as queries")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--db-features', help="also write the dataset's feature matrix here, as convert.py would, "
+                                          "from the graph ids recorded while mining")
+    ap.add_argument('--packed', action='store_true', help="--db-features as bit-packed uint64 rows (.npz, see featbits.py)")
+    args=ap.parse_args()
+    in_path=args.in_path
+    out_path=args.out_path
 
-    min_sup_cnt=1  # allow rare patterns to reach k
-    scored=mine_patterns(graphs, min_sup_cnt)
+    # the file is deduplicated on the first pass; later miner passes re-read it
+    graphs = DedupGraphs(in_path, args.cache)
 
-    k=50
-    top=scored[:k]
+    n_mine=args.k if args.select=='score' else (args.pool or 10*args.k)
+    tids=args.select=='greedy' or args.db_features is not None
+    if args.miner=='gspan':
+        top=mine_gspan(graphs, args.gspan_sup, args.max_edges, n_mine, tids)
+    elif args.miner=='import':
+        if not args.patterns:
+            ap.error("--miner import needs --patterns")
+        n_mined=args.mined_graphs or len(graph_offsets(in_path))
+        label_map=load_label_map(args.label_map) if args.label_map else None
+        top=top_mined(args.patterns, n_mined, n_mine, label_map)
+        if tids:
+            top=attach_tids(graphs, top)
+    else:
+        top=mine_patterns(graphs, args.min_sup, n_mine, args.workers, tids)
+    if args.select=='greedy':
+        top=select_greedy(top, max(graphs.rep)+1, args.k, args.sample, args.queries, args.seed)
+    if args.db_features is not None:
+        X=db_feature_matrix(top, graphs.rep)
+        if args.packed:
+            save_packed(args.db_features, X)
+        else:
+            np.save(args.db_features, X)
     with open(out_path,'w') as f:
-        for _, pat, sup in top:
-            # pat is tuple like ('EDGE', lu, el, lv) or ('PATH2', la,e1,lb,e2,lc) or ('TRI', ...)
+        for _, pat, *_ in top:
+            # pat is tuple like ('EDGE', lu, el, lv) or ('PATH2', la,e1,lb,e2,lc) or ('TRI', ...) or ('GRAPH', code...)
             f.write(" ".join(map(str, pat))+"\n")
 
 if __name__=="__main__":
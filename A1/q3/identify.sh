@@ -1,3 +1,3 @@
 #!/usr/bin/env bash
 set -e
-python3 identify.py "$1" "$2"
+python3 identify.py "$@"
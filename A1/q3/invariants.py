@@ -0,0 +1,126 @@
+"""Cheap graph invariants written by convert.py next to the feature matrix.
+
+Per graph: number of vertices, of edges and the maximum degree, then the
+number of vertices of every vertex label and of edges of every edge label.
+Edges are counted once per distinct (u, v, label), as subiso.py matches them,
+so a graph containing a query dominates it on every column (db >= query) and
+generate_candidates.py can drop the graphs that do not before any bit test.
+
+On disk: an .npz `<features>.inv.npz` (see invariants_path) with `values`
+int32 (n, 3+V+E), `vlabels`/`elabels`, the label of each count column, and
+`features`, the size and mtime of the feature file when the invariants were
+saved after it; a file that no longer matches is stale (invariants_match).
+"""
+import os, sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.store import file_stamp
+
+FIXED=('nv', 'ne', 'max_deg')
+IMPOSSIBLE=np.iinfo(np.int32).max  # nv of a query needing a label no db graph has
+
+def invariants_path(features_path):
+    # db_feat.npy / db_feat.npz / db_feat -> db_feat.inv.npz
+    for ext in ('.npy', '.npz'):
+        if features_path.endswith(ext):
+            features_path=features_path[:-len(ext)]
+    return features_path+'.inv.npz'
+
+class InvariantBuilder:
+    """Invariants of a stream of graphs, as yielded by graphio.iter_graphs.
+
+    Graphs are added one at a time and buffered; each block of them is
+    reduced at once over its concatenated arrays to per-graph totals and
+    sparse (graph, label, count) triples, which result() spreads into columns.
+    """
+
+    def __init__(self, block=4096):
+        self.block=block
+        self.buf=[]
+        self.n=0
+        self.fixed=[]     # per block: int32 (B, 3)
+        self.vtriples=[]  # per block: (graph ids, labels, counts)
+        self.etriples=[]
+
+    def add(self, labels, edges):
+        self.buf.append((labels, edges))
+        if len(self.buf)==self.block:
+            self._flush()
+
+    def _flush(self):
+        if not self.buf:
+            return
+        B=len(self.buf)
+        nv=np.array([len(l) for l, _ in self.buf])
+        ne=np.array([len(e) for _, e in self.buf])
+        v_off=np.zeros(B+1, dtype=np.int64)
+        np.cumsum(nv, out=v_off[1:])
+        vl=np.concatenate([l for l, _ in self.buf])
+        e=np.concatenate([e for _, e in self.buf]).astype(np.int64)
+        self.buf=[]
+        vgid=np.repeat(np.arange(B), nv)
+        egid=np.repeat(np.arange(B), ne)
+        # edges as distinct (u, v, label) over block-wide vertex positions
+        a=np.minimum(e[:, 0], e[:, 1])+v_off[egid]
+        b=np.maximum(e[:, 0], e[:, 1])+v_off[egid]
+        order=np.lexsort((e[:, 2], b, a))
+        a, b, el, egid = a[order], b[order], e[order, 2], egid[order]
+        first=np.ones(len(a), dtype=bool)
+        first[1:]=(a[1:]!=a[:-1]) | (b[1:]!=b[:-1]) | (el[1:]!=el[:-1])
+        a, b, el, egid = a[first], b[first], el[first], egid[first]
+        deg=np.bincount(np.concatenate((a, b)), minlength=len(vl))
+        present=vl>=0
+        fixed=np.empty((B, len(FIXED)), dtype=np.int32)
+        fixed[:, 0]=np.bincount(vgid[present], minlength=B)
+        fixed[:, 1]=np.bincount(egid, minlength=B)
+        fixed[:, 2]=np.maximum.reduceat(deg, v_off[:-1])  # every graph has a vertex
+        self.fixed.append(fixed)
+        for gid, labs, out in ((vgid[present], vl[present], self.vtriples), (egid, el, self.etriples)):
+            pairs, counts = np.unique(np.stack((gid+self.n, labs), axis=1), axis=0, return_counts=True)
+            out.append((pairs[:, 0], pairs[:, 1], counts))
+        self.n+=B
+
+    def result(self):
+        """(values, vlabels, elabels) of every graph added, in order."""
+        self._flush()
+        f=len(FIXED)
+        trip=lambda ts, i: np.concatenate([t[i] for t in ts]) if ts else np.zeros(0, np.int64)
+        vlabels=np.unique(trip(self.vtriples, 1))
+        elabels=np.unique(trip(self.etriples, 1))
+        values=np.zeros((self.n, f+len(vlabels)+len(elabels)), dtype=np.int32)
+        if self.n:
+            values[:, :f]=np.concatenate(self.fixed)
+        for ts, labs, off in ((self.vtriples, vlabels, f), (self.etriples, elabels, f+len(vlabels))):
+            values[trip(ts, 0), off+np.searchsorted(labs, trip(ts, 1))]=trip(ts, 2)
+        return values, vlabels, elabels
+
+def save_invariants(path, values, vlabels, elabels, features_path):
+    # features_path must already hold its final contents
+    with open(path, 'wb') as f:
+        np.savez(f, values=values, vlabels=vlabels, elabels=elabels, features=np.array(file_stamp(features_path), dtype=np.int64))
+
+def invariants_match(path, features_path):
+    """Whether the invariants at `path` were saved for the current contents
+    of `features_path`."""
+    with np.load(path, allow_pickle=False) as z:
+        return 'features' in z.files and tuple(z['features'].tolist())==file_stamp(features_path)
+
+def load_invariants(path):
+    with np.load(path, allow_pickle=False) as z:
+        return z['values'], z['vlabels'], z['elabels']
+
+def align_query(q_inv, db_inv):
+    """Query values in the db's columns. A query with a positive count for a
+    label missing from the db gets nv=IMPOSSIBLE, which no graph dominates."""
+    qv, qvl, qel = q_inv
+    dv, dvl, del_ = db_inv
+    out=np.zeros((len(qv), dv.shape[1]), dtype=np.int32)
+    f=len(FIXED)
+    out[:, :f]=qv[:, :f]
+    for ql, dl, qoff, doff in ((qvl, dvl, f, f), (qel, del_, f+len(qvl), f+len(dvl))):
+        found=np.isin(ql, dl)
+        out[:, doff+np.searchsorted(dl, ql[found])]=qv[:, qoff+np.flatnonzero(found)]
+        missing=(qv[:, qoff+np.flatnonzero(~found)]>0).any(axis=1)
+        out[missing, 0]=IMPOSSIBLE
+    return out
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Frequent subgraphs mined by Gaston or gSpan, as q3 GRAPH features.
+
+Result files are read one pattern block at a time:
+  Gaston  "# <support>", "t <id>", "v i l", "e u v l"
+  gSpan   "t # <id> * <support>", "v i l", "e u v l" (and "x: ..." graph ids, ignored)
+Patterns are scored like identify.py's own (f*(1-f) for support fraction f)
+and the k best become GRAPH lines: the pattern's edges as a flattened code
+(i, j, label_i, edge_label, label_j) with vertices numbered in BFS order.
+
+Label ids in the results are those of the miner's input. For input written
+by `minedpat.py export` they are q3's own labels; for input converted by
+q2/graphconv.py pass its JSON label dictionary so ids map back to the raw
+labels (which must then be integers, as in q3 graph files).
+
+Usage:
+  minedpat.py export <graphs> <out>         q3 graphs as Gaston/gSpan input
+  minedpat.py top <results> <n_graphs> <k> [<label_map.json>]
+"""
+import sys, json, heapq
+from collections import deque
+
+from graphio import iter_graphs
+
+def iter_mined(path):
+    """Yield (support, vertex labels, [(u, v, edge label)]) per mined pattern."""
+    support=None
+    labels=[]
+    edges=[]
+    started=False
+    with open(path) as f:
+        for line in f:
+            parts=line.split()
+            if not parts:
+                continue
+            tag=parts[0]
+            if tag=='#' or (tag=='t' and '*' in line):
+                if started:
+                    yield support, labels, edges
+                support=int(parts[1]) if tag=='#' else int(line.rsplit('*', 1)[1])
+                labels=[]
+                edges=[]
+                started=True
+            elif tag=='v':
+                labels.append(int(parts[2]))
+            elif tag=='e':
+                edges.append((int(parts[1]), int(parts[2]), int(parts[3])))
+    if started:
+        yield support, labels, edges
+
+def load_label_map(path):
+    """(vertex id -> label, edge id -> label) from a q2/graphconv.py JSON dictionary."""
+    with open(path) as f:
+        d=json.load(f)
+    return ({i: int(lab) for lab, i in d['vertex'].items()},
+            {i: int(lab) for lab, i in d['edge'].items()})
+
+def graph_feature(labels, edges, label_map=None):
+    """('GRAPH', i, j, li, el, lj, ...) of a connected pattern, vertices in BFS order from 0."""
+    if label_map is not None:
+        vmap, emap = label_map
+        labels=[vmap[l] for l in labels]
+        edges=[(u, v, emap[el]) for u, v, el in edges]
+    adj=[[] for _ in labels]
+    for u, v, _ in edges:
+        adj[u].append(v)
+        adj[v].append(u)
+    order={0: 0}
+    queue=deque([0])
+    while queue:
+        u=queue.popleft()
+        for w in adj[u]:
+            if w not in order:
+                order[w]=len(order)
+                queue.append(w)
+    if len(order)!=len(labels):
+        raise ValueError("mined pattern is not connected")
+    code=[]
+    for u, v, el in edges:
+        i, j = sorted((order[u], order[v]))
+        a, b = (u, v) if order[u]<order[v] else (v, u)
+        code.append((j, i, i, j, labels[a], el, labels[b]))
+    code.sort()
+    return ('GRAPH',)+tuple(x for c in code for x in c[2:])
+
+def top_mined(path, n_graphs, k, label_map=None):
+    """The k best-scored patterns of a results file as (score, GRAPH feature,
+    support), best first; `n_graphs` is the size of the mined dataset."""
+    def scored():
+        for s, labels, edges in iter_mined(path):
+            if edges:
+                frac=s/n_graphs
+                yield frac*(1-frac), s, labels, edges
+    # high score, then smaller support; equal keys keep file order
+    top=heapq.nlargest(k, scored(), key=lambda x:(x[0], -x[1]))
+    return [(score, graph_feature(labels, edges, label_map), s) for score, s, labels, edges in top]
+
+def export_graphs(graphs_path, out_path):
+    """Write q3 graphs as "t # i" / "v" / "e" transactions for Gaston and gSpan.
+
+    Vertex ids are made contiguous; self-loops and repeated (u, v, label)
+    edges are dropped, since neither miner takes them. Returns the graph count.
+    """
+    n=0
+    with open(out_path, 'w', buffering=1<<20) as f:
+        for labels, edges in iter_graphs(graphs_path):
+            labels=labels.tolist()
+            present=[u for u, l in enumerate(labels) if l>=0]
+            new={u: i for i, u in enumerate(present)}
+            out=[f"t # {n}\n"]
+            out+=[f"v {new[u]} {labels[u]}\n" for u in present]
+            seen=set()
+            for u, v, el in edges.tolist():
+                key=(min(u, v), max(u, v), el)
+                if u!=v and key not in seen:
+                    seen.add(key)
+                    out.append(f"e {new[u]} {new[v]} {el}\n")
+            f.write(''.join(out))
+            n+=1
+    return n
+
+def main():
+    args=sys.argv[1:]
+    if len(args)==3 and args[0]=='export':
+        print(export_graphs(args[1], args[2]), "graphs written")
+    elif len(args) in (4, 5) and args[0]=='top':
+        label_map=load_label_map(args[4]) if len(args)==5 else None
+        for _, feat, _ in top_mined(args[1], int(args[2]), int(args[3]), label_map):
+            print(" ".join(map(str, feat)))
+    else:
+        print(__doc__.split("Usage:")[1], file=sys.stderr)
+        sys.exit(2)
+
+if __name__=="__main__":
+    main()
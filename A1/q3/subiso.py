@@ -0,0 +1,152 @@
+"""Labelled subgraph matching of small patterns against compiled graphs.
+
+Matching is VF2-style backtracking over the CSR adjacency of
+convert.CompiledGraph. Before searching, a graph is rejected if it lacks one
+of the pattern's labelled edges or has fewer vertices of some label than the
+pattern. The search then starts from a pattern vertex of the label that is
+rarest in that graph (its candidates are the graph's bucket of that label),
+and keeps taking the unmapped vertex with the most edges into the mapped
+ones, then the highest degree; these orders are precomputed once per start
+label. Each new vertex is drawn from the neighbours of an already mapped
+one, must have at least its pattern degree, and every other pattern edge
+closing on it is checked in the graph's labelled edge set. Patterns may be
+whole query graphs: a vertex with no mapped neighbour (the first of each
+connected component) or with a self-loop is drawn from its label's bucket
+instead. Matching is non-induced and injective on vertices, as in gSpan.
+"""
+from collections import Counter
+
+class Pattern:
+    __slots__=('labels','adj','loops','deg','edge_pats','label_need','plans')
+
+    def __init__(self, labels, edges):
+        # labels: pattern vertex -> label; edges: (u, v, edge label), repeats ignored
+        n=len(labels)
+        adj=[[] for _ in range(n)]
+        loops=[[] for _ in range(n)]
+        edge_pats=set()
+        for u, v, el in dict.fromkeys((min(u, v), max(u, v), el) for u, v, el in edges):
+            adj[u].append((v, el))
+            adj[v].append((u, el))
+            if u==v:
+                loops[u].append(el)
+            lu, lv = labels[u], labels[v]
+            edge_pats.add((lu, el, lv) if lu<=lv else (lv, el, lu))
+        self.labels=list(labels)
+        self.adj=adj                                  # vertex -> [(neighbour, edge label)], a self-loop twice
+        self.loops=loops                              # vertex -> labels of its self-loops
+        self.deg=[len(a) for a in adj]                # counted like CompiledGraph.indptr
+        self.edge_pats=edge_pats                      # canonical (lu, el, lv) of every pattern edge
+        self.label_need=sorted(Counter(labels).items())  # (label, vertices needed)
+        self.plans={}                                 # start label -> search plan, see _plan
+        for l, _ in self.label_need:
+            start=max((v for v in range(n) if labels[v]==l), key=lambda v:self.deg[v])
+            self.plans[l]=_plan(self, start)
+
+    @classmethod
+    def from_code(cls, code):
+        """Build from a DFS code: a sequence of (i, j, label_i, edge_label, label_j)."""
+        nv=1+max(max(e[0], e[1]) for e in code)
+        labels=[None]*nv
+        for i, j, li, _, lj in code:
+            labels[i]=li
+            labels[j]=lj
+        return cls(labels, [(i, j, el) for i, j, _, el, _ in code])
+
+    @classmethod
+    def from_graph(cls, labels, edges):
+        """Build from a graph as yielded by graphio.iter_graphs (vertex ids compacted)."""
+        labels=labels.tolist()
+        new={}
+        for u, l in enumerate(labels):
+            if l>=0:
+                new[u]=len(new)
+        return cls([labels[u] for u in new], [(new[u], new[v], el) for u, v, el in edges.tolist()])
+
+def _plan(pat, start):
+    # search order from `start`: per position (label, degree, parent position,
+    # parent edge label, [(position, edge label)] of the other edges to earlier
+    # positions and of its self-loops). Without a parent (a component's first
+    # vertex, or one with a self-loop) candidates come from the label bucket
+    labels=pat.labels; adj=pat.adj; deg=pat.deg
+    n=len(labels)
+    pos={start: 0}
+    conn=[0]*n
+    plan=[(labels[start], deg[start], None, None, [(0, el) for el in pat.loops[start]])]
+    v=start
+    while True:
+        for w, _ in adj[v]:
+            conn[w]+=1
+        if len(pos)==n:
+            return plan
+        v=max((u for u in range(n) if u not in pos), key=lambda u:(conn[u], deg[u]))
+        back=[(pos[w], el) for w, el in adj[v] if w in pos]
+        pos[v]=len(plan)
+        back+=[(pos[v], el) for el in pat.loops[v]]
+        if conn[v] and not pat.loops[v]:
+            plan.append((labels[v], deg[v], back[0][0], back[0][1], back[1:]))
+        else:
+            plan.append((labels[v], deg[v], None, None, back))
+
+def contains(cg, pat):
+    """True if compiled graph `cg` contains pattern `pat`."""
+    if not pat.edge_pats<=cg.edge_pats:
+        return False
+    by_label=cg.by_label
+    rarest, fewest = None, None
+    for l, c in pat.label_need:
+        have=len(by_label.get(l, ()))
+        if have<c:
+            return False
+        if fewest is None or have<fewest:
+            rarest, fewest = l, have
+    if rarest is None:
+        return True  # the empty pattern
+    plan=pat.plans[rarest]
+    labels=cg.labels; indptr=cg.indptr; nbr=cg.nbr; nel=cg.nel; edge_set=cg.edge_set
+    n=len(plan)
+    m=[0]*n  # search position -> graph vertex
+    used=set()
+
+    def extend(j):
+        if j==n:
+            return True
+        lj, dj, p, el, checks = plan[j]
+        if p is None:
+            # a component's first vertex, or one with self-loops: any unused vertex of the label
+            for w in by_label.get(lj, ()):
+                if w in used or indptr[w+1]-indptr[w]<dj:
+                    continue
+                m[j]=w  # before the checks, which may include w's self-loops
+                ok=True
+                for k, ek in checks:
+                    if (m[k], w, ek) not in edge_set:
+                        ok=False
+                        break
+                if not ok:
+                    continue
+                used.add(w)
+                if extend(j+1):
+                    return True
+                used.discard(w)
+            return False
+        u=m[p]
+        for q in range(indptr[u], indptr[u+1]):
+            w=nbr[q]
+            if nel[q]!=el or labels[w]!=lj or w in used or indptr[w+1]-indptr[w]<dj:
+                continue
+            ok=True
+            for k, ek in checks:
+                if (m[k], w, ek) not in edge_set:
+                    ok=False
+                    break
+            if not ok:
+                continue
+            m[j]=w
+            used.add(w)
+            if extend(j+1):
+                return True
+            used.discard(w)
+        return False
+
+    return extend(0)
@@ -0,0 +1,49 @@
+import asyncio, json
+import numpy as np
+import pytest
+
+from candidate_server import CandidateService
+
+K=50
+
+@pytest.fixture
+def service(tmp_path):
+    db=(np.random.default_rng(0).random((30, K))<0.5).astype(np.uint8)
+    np.save(tmp_path/'db.npy', db)
+    return CandidateService(str(tmp_path/'db.npy'), method="scan"), db
+
+def _ask(service, path, requests):
+    # one connection, one reply line per request line
+    async def session():
+        server=await asyncio.start_unix_server(service.handle, path)
+        async with server:
+            reader, writer = await asyncio.open_unix_connection(path)
+            replies=[]
+            for req in requests:
+                writer.write(json.dumps(req).encode()+b"\n")
+                await writer.drain()
+                replies.append(json.loads(await reader.readline()))
+            writer.close()
+            return replies
+    return asyncio.run(session())
+
+def test_lookup_answers_single_and_batched_queries(tmp_path, service):
+    svc, db = service
+    q=db[3]&(np.arange(K)%4==0)
+    want=[int(i)+1 for i in np.flatnonzero((db>=q).all(axis=1))]
+    one, many = _ask(svc, str(tmp_path/'s.sock'), [{"id": 1, "queries": q.tolist()},
+                                                    {"id": 2, "queries": [q.tolist(), q.tolist()]}])
+    assert one["candidates"]==[want]
+    assert many["id"]==2 and many["candidates"]==[want, want]
+
+def test_malformed_queries_get_an_error_reply(tmp_path, service):
+    svc, db = service
+    half=[0, 1]*(K//4)+[0]
+    bad=[[half, half],                 # two short rows, not one full one
+         half,
+         [-1]+[0]*(K-1),
+         [[300]+[0]*(K-1)],
+         [[0]*(K-1)+[2**70]]]
+    replies=_ask(svc, str(tmp_path/'s.sock'), [{"id": i, "queries": q} for i, q in enumerate(bad)]+[{"op": "info"}])
+    assert all("error" in r and "candidates" not in r for r in replies[:-1])
+    assert replies[-1]["requests"]==0  # the connection still answers
@@ -0,0 +1,127 @@
+import os, sys, random, subprocess
+import numpy as np
+import pytest
+
+from convert import CompiledGraph, FeatureMatcher
+from graphio import iter_graphs
+from identify import decode_pattern, graph_patterns
+from subiso import Pattern, contains
+from verify import read_candidates
+
+HERE=os.path.dirname(os.path.abspath(__file__))
+
+def _np(labels, edges):
+    return np.array(labels, dtype=np.int32), np.array(edges, dtype=np.int32).reshape(-1, 3)
+
+def _feature_pattern(feat):
+    # TRI tuple -> subiso.Pattern
+    f=feat[1:]
+    return Pattern([f[0], f[2], f[4]], [(0, 1, f[1]), (0, 2, f[3]), (1, 2, f[5])])
+
+def test_tri_on_parallel_edges():
+    # the query's label 1 on (0,1) is not the first label listed there
+    g=CompiledGraph(*_np([0, 0, 0], [(0, 1, 0), (0, 1, 1), (1, 2, 0), (0, 2, 0)]))
+    feat=('TRI', 0, 0, 0, 0, 0, 1)
+    assert contains(g, _feature_pattern(feat))
+    assert FeatureMatcher([feat]).match(g)==[0]
+
+def test_feature_bits_agree_with_subiso_on_multigraphs():
+    rng=random.Random(3)
+    for _ in range(300):
+        n=rng.randint(3, 6)
+        labels=[rng.randint(0, 1) for _ in range(n)]
+        edges=[(rng.randrange(n), rng.randrange(n), rng.randint(0, 2)) for _ in range(rng.randint(2, 12))]
+        pids=graph_patterns(*_np(labels, edges))
+        feats=sorted(decode_pattern(pid) for pid in pids)
+        cg=CompiledGraph(*_np(labels, edges))
+        assert sorted(FeatureMatcher(feats).match(cg))==list(range(len(feats)))
+        # TRI bits are exactly subiso containment of the triangle (EDGE and
+        # PATH2 bits may also be set through a self-loop)
+        for feat in feats:
+            if feat[0]=='TRI':
+                assert contains(cg, _feature_pattern(feat)), feat
+        # and a contained triangle always has its bit
+        a, b, c = (rng.randint(0, 1) for _ in range(3))
+        e1, e2, e3 = (rng.randint(0, 2) for _ in range(3))
+        feat=('TRI',)+min(((a,e1,b,e2,c,e3), (a,e2,c,e1,b,e3), (b,e1,a,e3,c,e2),
+                           (b,e3,c,e1,a,e2), (c,e2,a,e3,b,e1), (c,e3,b,e2,a,e1)))
+        assert (feat in feats)==contains(cg, _feature_pattern(feat)), (labels, edges, feat)
+
+def _run(script, *args):
+    subprocess.run([sys.executable, os.path.join(HERE, script), *map(str, args)],
+                   check=True, capture_output=True)
+
+def _write_graphs(path, graphs):
+    with open(path, 'w') as f:
+        for labels, edges in graphs:
+            for v, l in enumerate(labels):
+                f.write(f"v {v} {l}\n")
+            for u, v, el in edges:
+                f.write(f"e {u} {v} {el}\n")
+            f.write("#\n")
+
+def _dataset(tmp_path, seed=0):
+    rng=random.Random(seed)
+    db=[]
+    for _ in range(80):
+        n=rng.randint(3, 9)
+        labels=[rng.randint(0, 3) for _ in range(n)]
+        edges=[(v, rng.randrange(v), rng.randint(0, 1)) for v in range(1, n)]  # connected
+        edges+=[(rng.randrange(n), rng.randrange(n), rng.randint(0, 1)) for _ in range(rng.randint(0, 4))]
+        db.append((labels, edges))
+    queries=[]
+    for _ in range(25):
+        # a connected piece of a db graph: grow an edge set from one edge
+        labels, edges = rng.choice(db)
+        picked=[rng.choice(edges)]
+        for _ in range(rng.randint(0, 3)):
+            touched={x for u, v, _ in picked for x in (u, v)}
+            nxt=[e for e in edges if e not in picked and (e[0] in touched or e[1] in touched)]
+            if nxt:
+                picked.append(rng.choice(nxt))
+        ids={x: i for i, x in enumerate(sorted({x for u, v, _ in picked for x in (u, v)}))}
+        queries.append(([labels[x] for x in ids], [(ids[u], ids[v], el) for u, v, el in picked]))
+    queries.append(([3, 3, 3], [(0, 1, 1), (1, 2, 1), (2, 0, 1)]))  # likely in no graph
+    _write_graphs(tmp_path/'db.txt', db)
+    _write_graphs(tmp_path/'q.txt', queries)
+    return tmp_path/'db.txt', tmp_path/'q.txt'
+
+def _answers(db_path, q_path):
+    db=[CompiledGraph(l, e) for l, e in iter_graphs(str(db_path))]
+    return [{i+1 for i, cg in enumerate(db) if contains(cg, Pattern.from_graph(l, e))}
+            for l, e in iter_graphs(str(q_path))]
+
+def _read(path):
+    return [set(ids.tolist()) for _, ids in read_candidates(str(path))]
+
+@pytest.fixture(scope='module')
+def pipeline(tmp_path_factory):
+    tmp=tmp_path_factory.mktemp('cand')
+    db, q = _dataset(tmp)
+    _run('identify.py', db, tmp/'feats.txt', '-k', 12)
+    _run('convert.py', db, tmp/'feats.txt', tmp/'db.npy')
+    _run('convert.py', q, tmp/'feats.txt', tmp/'q.npy')
+    return tmp, _answers(db, q)
+
+@pytest.mark.parametrize('opts', [(), ('--method', 'scan'), ('--method', 'postings'), ('--no-invariants',)])
+def test_candidates_contain_the_answers(pipeline, opts):
+    tmp, answers = pipeline
+    _run('generate_candidates.py', tmp/'db.npy', tmp/'q.npy', tmp/'c.txt', *opts)
+    cands=_read(tmp/'c.txt')
+    assert len(cands)==len(answers)
+    for qi, (c, a) in enumerate(zip(cands, answers)):
+        assert a<=c, qi
+    assert sum(map(len, cands))<len(cands)*80  # the features prune something
+
+def test_invariants_only_remove_non_answers(pipeline):
+    tmp, answers = pipeline
+    _run('generate_candidates.py', tmp/'db.npy', tmp/'q.npy', tmp/'c_inv.txt')
+    _run('generate_candidates.py', tmp/'db.npy', tmp/'q.npy', tmp/'c_bits.txt', '--no-invariants')
+    for a, ci, cb in zip(answers, _read(tmp/'c_inv.txt'), _read(tmp/'c_bits.txt')):
+        assert a<=ci<=cb
+
+def test_verify_finds_exactly_the_answers(pipeline):
+    tmp, answers = pipeline
+    _run('generate_candidates.py', tmp/'db.npy', tmp/'q.npy', tmp/'c.txt')
+    _run('verify.py', tmp/'db.txt', tmp/'q.txt', tmp/'c.txt', tmp/'ans.txt')
+    assert _read(tmp/'ans.txt')==answers
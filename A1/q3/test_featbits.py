@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from featbits import build_postings, intersect_postings, load_words, n_words, pack_rows, save_packed, unpack_rows
+
+@pytest.mark.parametrize('k', [1, 7, 63, 64, 65, 130])
+def test_pack_unpack_round_trip(k):
+    X=(np.random.default_rng(k).random((37, k))<0.3).astype(np.uint8)
+    words=pack_rows(X)
+    assert words.dtype==np.dtype('<u8') and words.shape==(37, n_words(k))
+    assert np.array_equal(unpack_rows(words, k), X)
+
+def test_subset_test_on_words():
+    rng=np.random.default_rng(0)
+    db=(rng.random((50, 90))<0.5).astype(np.uint8)
+    q=(rng.random((20, 90))<0.1).astype(np.uint8)
+    dw, qw = pack_rows(db), pack_rows(q)
+    got=((dw[None, :, :] & qw[:, None, :])==qw[:, None, :]).all(axis=2)
+    want=(db[None, :, :]>=q[:, None, :]).all(axis=2)
+    assert np.array_equal(got, want)
+
+def test_saved_packed_and_plain_load_alike(tmp_path):
+    X=(np.random.default_rng(1).random((10, 70))<0.4).astype(np.uint8)
+    save_packed(str(tmp_path/'x.npz'), X)
+    np.save(tmp_path/'x.npy', X)
+    for name in ('x.npz', 'x.npy'):
+        words, k = load_words(str(tmp_path/name))
+        assert k==70 and np.array_equal(unpack_rows(words, k), X)
+
+def test_postings_intersection():
+    X=(np.random.default_rng(2).random((60, 12))<0.5).astype(np.uint8)
+    indptr, ids = build_postings(pack_rows(X), 12)
+    feats=np.array([1, 4, 9])
+    got=intersect_postings(indptr, ids, feats, 60)
+    assert np.array_equal(got, np.flatnonzero(X[:, feats].all(axis=1)))
@@ -0,0 +1,93 @@
+import os, random
+import numpy as np
+import pytest
+
+import graphio
+from graphio import graph_offsets, iter_graphs
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+def _random_db(path, count, seed=0):
+    rng=random.Random(seed)
+    lines=[]
+    for _ in range(count):
+        n=rng.randint(1, 6)
+        for v in range(n):
+            lines.append(f"v {v} {rng.randint(0, 3)}")
+        for _ in range(rng.randint(0, 6)):
+            lines.append(f"e {rng.randrange(n)} {rng.randrange(n)} {rng.randint(0, 2)}")
+        lines.append("#")
+    return _write(path, "\n".join(lines)+"\n")
+
+def _same(a, b):
+    return len(a)==len(b) and all(np.array_equal(x[0], y[0]) and np.array_equal(x[1], y[1]) for x, y in zip(a, b))
+
+def test_parse(tmp_path):
+    path=_write(tmp_path/'g.txt', "v 0 1\nv 2 3\ne 0 2 5\ne 0 1 4\n#\n#\ne 0 1 1\n#\nv 0 7\ne 0 0 -2\n#\nv 0 1\n")
+    graphs=list(iter_graphs(path))
+    assert len(graphs)==2
+    labels, edges = graphs[0]
+    assert labels.tolist()==[1, -1, 3]
+    assert edges.tolist()==[[0, 2, 5]]  # vertex 1 has no label
+    assert graphs[1][0].tolist()==[7] and graphs[1][1].tolist()==[[0, 0, -2]]
+    assert labels.dtype==np.int32 and edges.dtype==np.int32 and edges.shape[1]==3
+
+def test_sparse_ids_are_renumbered(tmp_path):
+    path=_write(tmp_path/'g.txt', "v 5 1\nv 1000000 2\ne 5 1000000 3\ne 5 7 1\n#\n")
+    (labels, edges), = iter_graphs(path)
+    assert labels.tolist()==[1, 2]
+    assert edges.tolist()==[[0, 1, 3]]
+
+@pytest.mark.parametrize('text', ["v -1 1\n#\n", "v 0 -1\n#\n", "x 0\n#\n"])
+def test_rejects_bad_lines(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iter_graphs(_write(tmp_path/'g.txt', text)))
+
+def test_byte_ranges_and_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(graphio, '_BLOCK', 7)
+    path=_random_db(tmp_path/'g.txt', 50)
+    whole=list(iter_graphs(path))
+    offs=[0]+graph_offsets(path)
+    assert len(offs)-1==len(whole)==50
+    parts=[]
+    for i in range(0, 50, 9):
+        parts+=list(iter_graphs(path, offs[i], offs[min(i+9, 50)]))
+    assert _same(parts, whole)
+
+def test_cache_round_trip(tmp_path):
+    path=_random_db(tmp_path/'g.txt', 30)
+    store=graphio.open_graphs(path)
+    assert isinstance(store, graphio.GraphStore)
+    assert _same(list(store), list(iter_graphs(path)))
+    assert _same([store[i] for i in (3, 0, 29)], [list(iter_graphs(path))[i] for i in (3, 0, 29)])
+    assert graphio.cache_is_fresh(path)
+    assert sorted(p.name for p in tmp_path.iterdir())==['g.txt', 'g.txt.gcache']
+
+def test_cache_follows_the_source(tmp_path):
+    path=_random_db(tmp_path/'g.txt', 10)
+    graphio.open_graphs(path)
+    st=(tmp_path/'g.txt').stat()
+    # touched but unchanged: kept, and re-stamped with the new mtime
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns+10**9))
+    assert graphio.cache_is_fresh(path)
+    _random_db(tmp_path/'g.txt', 12, seed=1)
+    assert not graphio.cache_is_fresh(path)
+    assert _same(list(graphio.open_graphs(path)), list(iter_graphs(path)))
+
+def test_array_tokeniser_agrees_with_lines(tmp_path, monkeypatch):
+    path=_random_db(tmp_path/'g.txt', 40, seed=2)
+    buf=open(path, 'rb').read()
+    fast, slow = graphio._rows_fast(buf), graphio._rows_lines(buf)
+    assert all(np.array_equal(x, y) for x, y in zip(fast, slow))
+    for line in (b"v 0 1 9\n", b"v 0 +\n", b"v 0 1\x00\n", b"e 0 1 4294967296\n", b"v 0 1 e 0 1 2\n"):
+        assert graphio._rows_fast(buf+line+b"#\n") is None
+    # chunks cut inside graphs, some of them parsed line by line
+    path2=_write(tmp_path/'h.txt', buf.replace(b"#\n", b"#\n\n  v 0 0 7\r\n#\n", 3).decode())
+    rows_fast=graphio._rows_fast
+    monkeypatch.setattr(graphio, '_rows_fast', lambda buf: None)
+    want=list(iter_graphs(path2))
+    monkeypatch.setattr(graphio, '_rows_fast', rows_fast)
+    monkeypatch.setattr(graphio, '_CHUNK', 50)
+    assert _same(list(iter_graphs(path2)), want)
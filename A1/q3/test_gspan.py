@@ -0,0 +1,41 @@
+import random
+import numpy as np
+
+import gspan
+from convert import CompiledGraph
+from subiso import Pattern, contains
+
+def _graphs(seed, count=40):
+    rng=random.Random(seed)
+    out=[]
+    for _ in range(count):
+        n=rng.randint(2, 7)
+        edges=[(rng.randrange(n), rng.randrange(n), rng.randint(0, 1)) for _ in range(rng.randint(1, 9))]
+        out.append((np.array([rng.randint(0, 1) for _ in range(n)], dtype=np.int32),
+                    np.array(edges, dtype=np.int32).reshape(-1, 3)))
+    return out
+
+def test_supports_and_graph_ids_match_subiso():
+    graphs=_graphs(0)
+    compiled=[CompiledGraph(l, e) for l, e in graphs]
+    mined=list(gspan.mine(graphs, 3, 3))
+    assert mined
+    for code, s, gids in mined:
+        pat=Pattern.from_code(code)
+        want=[i for i, cg in enumerate(compiled) if contains(cg, pat)]
+        assert list(gids)==want, code
+        assert s==len(want)>=3
+        assert len(code)<=3 and gspan.is_min(code)
+
+def test_every_frequent_edge_is_mined_once():
+    graphs=_graphs(1)
+    sup={}
+    for i, (labels, edges) in enumerate(graphs):
+        for u, v, el in edges.tolist():
+            if u!=v:
+                lu, lv = sorted((int(labels[u]), int(labels[v])))
+                sup.setdefault((lu, el, lv), set()).add(i)
+    frequent={key for key, ids in sup.items() if len(ids)>=5}
+    one_edge=[code[0] for code, _, _ in gspan.mine(graphs, 5, 1)]
+    assert len(one_edge)==len(set(one_edge))
+    assert {(min(li, lj), el, max(li, lj)) for _, _, li, el, lj in one_edge}==frequent
@@ -0,0 +1,44 @@
+import random
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+import identify
+from identify import DedupGraphs, graph_signature
+
+def _db(path, seed=0):
+    rng=random.Random(seed)
+    graphs=[]
+    for _ in range(30):
+        n=rng.randint(1, 4)
+        graphs.append(([rng.randint(0, 1) for _ in range(n)],
+                       [(rng.randrange(n), rng.randrange(n), rng.randint(0, 1)) for _ in range(rng.randint(0, 3))]))
+    graphs+=[rng.choice(graphs) for _ in range(20)]
+    rng.shuffle(graphs)
+    with open(path, 'w') as f:
+        for labels, edges in graphs:
+            f.write("".join(f"v {v} {l}\n" for v, l in enumerate(labels)))
+            f.write("".join(f"e {u} {v} {el}\n" for u, v, el in edges))
+            f.write("#\n")
+    return str(path), graphs
+
+class _SameDigest:
+    # blake2b stand-in under which every signature collides
+    def __init__(self, data, digest_size):
+        pass
+    def digest(self):
+        return b'x'
+
+@pytest.mark.parametrize('cache', [False, True])
+@pytest.mark.parametrize('collide', [False, True])
+def test_dedup_keeps_first_occurrences(tmp_path, monkeypatch, cache, collide):
+    if collide:
+        monkeypatch.setattr(identify, 'hashlib', SimpleNamespace(blake2b=_SameDigest))
+    path, graphs = _db(tmp_path/'g.txt')
+    sigs=[graph_signature(np.array(l, dtype=np.int32), np.array(e, dtype=np.int32).reshape(-1, 3))
+          for l, e in graphs]
+    first=sorted({s: i for i, s in reversed(list(enumerate(sigs)))}.values())
+    dedup=DedupGraphs(path, cache)
+    for _ in range(2):  # the second pass re-reads the file
+        assert [graph_signature(l, e) for l, e in dedup]==[sigs[i] for i in first]
+    assert [first[r] for r in dedup.rep]==[sigs.index(s) for s in sigs]
@@ -0,0 +1,47 @@
+import itertools, random
+import numpy as np
+
+from convert import CompiledGraph
+from subiso import Pattern, contains
+
+def _arrays(labels, edges):
+    return np.array(labels, dtype=np.int32), np.array(edges, dtype=np.int32).reshape(-1, 3)
+
+def _brute(gl, ge, pl, pe):
+    # injective, label preserving, non-induced: try every vertex assignment
+    G={(min(u, v), max(u, v), el) for u, v, el in ge}
+    P={(min(u, v), max(u, v), el) for u, v, el in pe}
+    for m in itertools.permutations(range(len(gl)), len(pl)):
+        if all(gl[m[i]]==pl[i] for i in range(len(pl))) and \
+           all((min(m[u], m[v]), max(m[u], m[v]), el) in G for u, v, el in P):
+            return True
+    return False
+
+def test_contains_matches_brute_force():
+    rng=random.Random(0)
+    found=0
+    for _ in range(1500):
+        n=rng.randint(1, 6)
+        gl=[rng.randint(0, 1) for _ in range(n)]
+        ge=[(rng.randrange(n), rng.randrange(n), rng.randint(0, 1)) for _ in range(rng.randint(0, 9))]
+        k=rng.randint(1, min(n, 4))
+        pl=[rng.randint(0, 1) for _ in range(k)]
+        pe=[(rng.randrange(k), rng.randrange(k), rng.randint(0, 1)) for _ in range(rng.randint(0, 4))]
+        want=_brute(gl, ge, pl, pe)
+        found+=want
+        assert contains(CompiledGraph(*_arrays(gl, ge)), Pattern.from_graph(*_arrays(pl, pe)))==want, (gl, ge, pl, pe)
+    assert 0<found<1500
+
+def test_triangle_is_not_a_path():
+    path=CompiledGraph(*_arrays([0, 0, 0], [(0, 1, 0), (1, 2, 0)]))
+    tri=CompiledGraph(*_arrays([0, 0, 0], [(0, 1, 0), (1, 2, 0), (2, 0, 0)]))
+    pat=Pattern.from_code([(0, 1, 0, 0, 0), (1, 2, 0, 0, 0), (2, 0, 0, 0, 0)])
+    assert contains(tri, pat)
+    assert not contains(path, pat)
+
+def test_edge_label_and_self_loop():
+    g=CompiledGraph(*_arrays([1, 2], [(0, 1, 5), (1, 1, 7)]))
+    assert contains(g, Pattern([2, 1], [(1, 0, 5)]))
+    assert not contains(g, Pattern([1, 2], [(0, 1, 6)]))
+    assert contains(g, Pattern([2], [(0, 0, 7)]))
+    assert not contains(g, Pattern([1], [(0, 0, 7)]))
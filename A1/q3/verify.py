@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Exact answers to subgraph queries from their candidate sets.
+
+Reads the candidates of generate_candidates.py ("q # i" / "c # ids",
+1-indexed) and keeps the db graphs that contain query i, in two stages:
+
+  1. dominance filters over a query's candidates, as NumPy array tests: the
+     graph has at least as many vertices of every label as the query, and its
+     degree sequence (descending) is >= the query's position by position;
+  2. subiso.contains on the survivors, chunked over a process pool.
+
+Both filters are necessary for an embedding (injective, label preserving,
+non-induced), so no answer is lost. The filter vectors of every db graph are
+computed in one pass over the arrays of its graphio cache; workers open the
+same cache and keep the graphs they compile in an LRU cache.
+
+Answers are written in the candidate format, one "q # i" / "c # ids" pair per
+query (the id list may be empty). A summary goes to stderr.
+
+Usage: verify.py [--workers N] [--chunk C] <db_graphs> <query_graphs> <candidates> <out>
+"""
+import sys, argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from convert import CompiledGraph
+from graphio import iter_graphs, open_graphs
+from subiso import Pattern, contains
+
+def read_candidates(path):
+    """Yield (query number, int64 array of 1-based db ids) per query."""
+    qi=None
+    with open(path) as f:
+        for line in f:
+            if line.startswith('q #'):
+                qi=int(line[3:])
+            elif line.startswith('c #'):
+                yield qi, np.array(line[3:].split(), dtype=np.int64)
+
+class DominanceFilter:
+    """Label-count and degree-sequence vectors of every graph of a GraphStore.
+
+    `labels` are the vertex labels of the db (sorted), `counts[g, c]` the
+    number of vertices of labels[c] in graph g, and `degs[g]` the first
+    `width` degrees of g in descending order (zero padded). Degrees count
+    edge endpoints like CompiledGraph.indptr.
+    """
+
+    def __init__(self, store, width):
+        n=len(store)
+        vl=np.asarray(store.vlabels)
+        e=np.asarray(store.edges)
+        gid=np.repeat(np.arange(n), np.diff(store.v_off))
+        present=vl>=0
+        self.labels, lab = np.unique(vl[present], return_inverse=True)
+        L=len(self.labels)
+        self.counts=np.bincount(gid[present]*L+lab, minlength=n*L).reshape(n, L).astype(np.int32)
+        # endpoints as positions in the concatenated vertex array
+        base=np.repeat(store.v_off[:-1], np.diff(store.e_off))
+        deg=np.bincount(np.concatenate((base+e[:, 0], base+e[:, 1])), minlength=len(vl))
+        order=np.lexsort((-deg, gid))
+        rank=np.arange(len(vl))-store.v_off[gid]  # gid is sorted, so is gid[order]
+        keep=rank<width
+        self.degs=np.zeros((n, width), dtype=np.int32)
+        self.degs[gid[keep], rank[keep]]=deg[order][keep]
+
+    def survivors(self, pat, ids):
+        """The 0-based ids among `ids` that pass both filters for Pattern `pat`."""
+        qlabels=np.array([l for l, _ in pat.label_need], dtype=np.int64)
+        need=np.array([c for _, c in pat.label_need], dtype=np.int32)
+        if not np.isin(qlabels, self.labels).all():
+            return ids[:0]  # a label no db graph has
+        cols=np.searchsorted(self.labels, qlabels)
+        ok=(self.counts[ids[:, None], cols]>=need).all(axis=1)
+        qdeg=sorted(pat.deg, reverse=True)
+        ok&=(self.degs[ids, :len(qdeg)]>=qdeg).all(axis=1)
+        return ids[ok]
+
+_store=None
+
+def _init_worker(db_path):
+    global _store
+    _store=open_graphs(db_path)
+    _compiled.cache_clear()
+
+@lru_cache(maxsize=1<<14)
+def _compiled(i):
+    return CompiledGraph(*_store[i])
+
+def _verify_chunk(task):
+    # task: (query labels, query edges, 0-based db ids) -> ids containing the query
+    labels, edges, ids = task
+    pat=Pattern.from_graph(labels, edges)
+    return [i for i in ids.tolist() if contains(_compiled(i), pat)]
+
+def verify(db_path, query_path, cand_path, out_path, workers=1, chunk=256):
+    """Write the exact answers; returns (candidates, filter survivors, answers)."""
+    store=open_graphs(db_path)  # always cached: graphs are fetched by id
+    queries=list(iter_graphs(query_path))
+    pats=[Pattern.from_graph(labels, edges) for labels, edges in queries]
+    filt=DominanceFilter(store, max((len(p.labels) for p in pats), default=0))
+
+    n_cands=n_kept=0
+    per_query=[]  # (query number, number of chunks)
+    tasks=[]
+    for qi, ids in read_candidates(cand_path):
+        if not 1<=qi<=len(queries):
+            raise ValueError(f"Candidates for query {qi}, but {query_path} has {len(queries)} graphs")
+        kept=filt.survivors(pats[qi-1], ids-1)
+        n_cands+=len(ids)
+        n_kept+=len(kept)
+        labels, edges = queries[qi-1]
+        chunks=[kept[s:s+chunk] for s in range(0, len(kept), chunk)]
+        per_query.append((qi, len(chunks)))
+        tasks+=[(labels, edges, c) for c in chunks]
+
+    n_ans=0
+    if workers>1:
+        ex=ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(db_path,))
+        results=ex.map(_verify_chunk, tasks)
+    else:
+        ex=None
+        _init_worker(db_path)
+        results=map(_verify_chunk, tasks)
+    try:
+        with open(out_path, 'w') as out:
+            for qi, nc in per_query:
+                ans=[i+1 for _ in range(nc) for i in next(results)]
+                n_ans+=len(ans)
+                out.write(f"q # {qi}\nc # "+" ".join(map(str, ans))+"\n")
+    finally:
+        if ex is not None:
+            ex.shutdown()
+    return n_cands, n_kept, n_ans
+
+def main():
+    ap=argparse.ArgumentParser(usage="verify.py [--workers N] [--chunk C] <db_graphs> <query_graphs> <candidates> <out>")
+    ap.add_argument('db_path')
+    ap.add_argument('query_path')
+    ap.add_argument('cand_path')
+    ap.add_argument('out_path')
+    ap.add_argument('--workers', type=int, default=1, help="match candidate chunks in N processes")
+    ap.add_argument('--chunk', type=int, default=256, help="candidates of one query per matching task")
+    args=ap.parse_args()
+
+    n_cands, n_kept, n_ans = verify(args.db_path, args.query_path, args.cand_path, args.out_path, args.workers, args.chunk)
+    print(f"{n_cands} candidates, {n_kept} after dominance filters, {n_ans} answers", file=sys.stderr)
+
+if __name__=="__main__":
+    main()